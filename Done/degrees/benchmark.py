@@ -0,0 +1,121 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from util import (Node, StackFrontier, QueueFrontier,
+                  DequeStackFrontier, DequeQueueFrontier)
+
+# Pairs of (label, original frontier, deque-backed frontier) to compare
+FRONTIERS = [
+    ("stack", StackFrontier, DequeStackFrontier),
+    ("queue", QueueFrontier, DequeQueueFrontier),
+]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    for compact in (False, True):
+        label = "compact" if compact else "dict"
+        size = load_memory(directory, compact)
+        print(f"{label} load: {size / 2 ** 20:.1f} MiB")
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    queries = random_pairs(pairs)
+    for label, original, replacement in FRONTIERS:
+        before = time_searches(original, queries)
+        after = time_searches(replacement, queries)
+        print(f"{label}: {original.__name__} {before:.3f}s, "
+              f"{replacement.__name__} {after:.3f}s "
+              f"({before / max(after, 1e-9):.1f}x)")
+
+    report_search_work("without co-star index", queries)
+    degrees.build_costar_index()
+    report_search_work("with co-star index", queries)
+
+
+def load_memory(directory, compact):
+    """
+    Returns the number of bytes held after loading `directory`,
+    either into dictionaries or into a CompactGraph.
+    """
+    tracemalloc.start()
+    degrees.load_data(directory, compact=compact, snapshot=False)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def random_pairs(n, seed=0):
+    """
+    Returns `n` random (source, target) pairs of person ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(n)
+    ]
+
+
+def time_searches(frontier_class, queries):
+    """
+    Returns the total time taken to answer every query with
+    `frontier_class` as the search frontier.
+    """
+    start = time.perf_counter()
+    for source, target in queries:
+        search(frontier_class, source, target)
+    return time.perf_counter() - start
+
+
+def report_search_work(label, queries):
+    """
+    Prints the time, nodes expanded and tuples allocated by
+    `shortest_path` over all queries.
+    """
+    totals = dict.fromkeys(degrees.search_stats, 0)
+    start = time.perf_counter()
+    for source, target in queries:
+        degrees.shortest_path(source, target)
+        for counter, value in degrees.search_stats.items():
+            totals[counter] += value
+    elapsed = time.perf_counter() - start
+    print(f"shortest_path {label}: {elapsed:.3f}s, "
+          f"{totals['nodes_expanded']} nodes expanded, "
+          f"{totals['tuples_allocated']} tuples allocated")
+
+
+def search(frontier_class, source, target):
+    """
+    Searches from source to target the way the lecture's maze solver
+    does, leaning on `contains_state` to avoid duplicate frontier entries.
+
+    Returns the number of people explored.
+    """
+    frontier = frontier_class()
+    frontier.add(Node(state=source, parent=None, action=None))
+    explored = set()
+
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state == target:
+            break
+        explored.add(node.state)
+        for movie_id, person_id in degrees.neighbors_for_person(node.state):
+            if not frontier.contains_state(person_id) and person_id not in explored:
+                frontier.add(Node(state=person_id, parent=node, action=movie_id))
+
+    return len(explored)
+
+
+if __name__ == "__main__":
+    main()
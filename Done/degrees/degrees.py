@@ -1,7 +1,20 @@
+import argparse
 import csv
+import functools
+import hashlib
+import json
+import os
+import struct
 import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import CompactGraph, breadth_first
+from landmarks import LandmarkIndex
+from nameindex import NameIndex, split_birth
+from snapshot import load_graph, source_stamps
+from util import DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,15 +25,156 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph used in place of `people` and `movies` when loaded compactly
+graph = None
 
-def load_data(directory):
+# Number of per-source search trees kept by `search_tree`; each one is
+# sized to the whole graph, so only a few fit alongside it in memory
+TREE_CACHE_SIZE = 4
+
+# Person_ids already queried as a source, oldest first, so that only a
+# source asked about again gets a full search tree built and cached
+queried_sources = {}
+queried_sources_lock = threading.Lock()
+
+# Number of sources remembered in `queried_sources`
+QUERIED_SOURCES_SIZE = 4096
+
+# Maps person_ids to a tuple of deduplicated (movie_id, person_id) co-star
+# pairs, once precomputed by `build_costar_index`
+costar_index = None
+
+# People in at least this many movies have their co-stars cached
+HOT_ACTOR_MOVIES = 20
+
+# Number of hot actors whose co-stars are kept by `hot_costars`
+COSTAR_CACHE_SIZE = 4096
+
+# Work done by the most recent search over the dictionaries
+search_stats = {"nodes_expanded": 0, "tuples_allocated": 0}
+
+# LandmarkIndex used for bounds and guided searches, if one is loaded
+landmark_index = None
+
+# Stamp of the CSV files and filters the loaded data came from, which a
+# saved LandmarkIndex must have been built with to be used
+dataset = None
+
+# NameIndex over everyone loaded, built on the first fuzzy lookup
+name_index = None
+
+# Number of ranked candidates offered for an unresolved name
+CANDIDATES = 10
+
+
+def load_data(directory, compact=False, snapshot=True,
+              min_year=None, max_cast=None, movie_ids=None):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, the star graph is kept in a CompactGraph
+    instead of the `names`, `people` and `movies` dictionaries. Unless
+    `snapshot` is false or a filter is given, that graph is
+    memory-mapped from a binary snapshot written next to the CSV files
+    on the first load.
+
+    Only movies from `min_year` on, with at most `max_cast` stars and
+    whose id is in `movie_ids` are kept, when those filters are given;
+    people who are left without any movie are then dropped too.
+
+    Returns a dictionary counting the rows that were dropped and why,
+    or None when the graph came straight from the CSVs or a snapshot.
     """
+    global graph, costar_index, landmark_index, name_index, dataset
+
+    # Start from nothing, so a reload never keeps data from before
+    names.clear()
+    people.clear()
+    movies.clear()
+    graph = None
+    search_tree.cache_clear()
+    with queried_sources_lock:
+        queried_sources.clear()
+    hot_costars.cache_clear()
+    costar_index = None
+    landmark_index = None
+    name_index = None
+    dataset = dataset_stamp(directory, min_year, max_cast, movie_ids)
+    filtered = (min_year is not None or max_cast is not None
+                or movie_ids is not None)
+    if compact and not filtered:
+        if snapshot:
+            graph = load_graph(directory)
+        else:
+            graph = CompactGraph.from_csv(directory)
+        return None
+
+    dropped = {
+        "movies_before_min_year": 0,
+        "movies_not_allowed": 0,
+        "movies_over_max_cast": 0,
+        "stars_of_dropped_movies": 0,
+        "stars_with_unknown_movie": 0,
+        "stars_with_unknown_person": 0,
+        "people_without_movies": 0,
+    }
+
+    # Load movies, keeping only those that pass the filters
+    filtered_out = set()
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if movie_ids is not None and row["id"] not in movie_ids:
+                dropped["movies_not_allowed"] += 1
+                filtered_out.add(row["id"])
+                continue
+            if min_year is not None and not _year_at_least(row["year"],
+                                                           min_year):
+                dropped["movies_before_min_year"] += 1
+                filtered_out.add(row["id"])
+                continue
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    # Stream stars into the kept movies only
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie = movies.get(row["movie_id"])
+            if movie is not None:
+                movie["stars"].add(row["person_id"])
+            elif row["movie_id"] in filtered_out:
+                dropped["stars_of_dropped_movies"] += 1
+            else:
+                dropped["stars_with_unknown_movie"] += 1
+
+    if max_cast is not None:
+        for movie_id in [
+            movie_id for movie_id, movie in movies.items()
+            if len(movie["stars"]) > max_cast
+        ]:
+            dropped["movies_over_max_cast"] += 1
+            dropped["stars_of_dropped_movies"] += len(
+                movies.pop(movie_id)["stars"]
+            )
+
+    # Without filters everyone is kept, as before
+    referenced = None
+    if filtered:
+        referenced = set()
+        for movie in movies.values():
+            referenced.update(movie["stars"])
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            if referenced is not None and row["id"] not in referenced:
+                dropped["people_without_movies"] += 1
+                continue
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
@@ -31,36 +185,115 @@ def load_data(directory):
             else:
                 names[row["name"].lower()].add(row["id"])
 
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    # Link people to their movies, dropping stars with unknown people
+    for movie_id, movie in movies.items():
+        unknown = set()
+        for person_id in movie["stars"]:
+            person = people.get(person_id)
+            if person is None:
+                unknown.add(person_id)
+            else:
+                person["movies"].add(movie_id)
+        dropped["stars_with_unknown_person"] += len(unknown)
+        movie["stars"] -= unknown
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    if compact:
+        graph = CompactGraph.from_data(people, movies)
+        names.clear()
+        people.clear()
+        movies.clear()
+
+    return dropped
+
+
+def dataset_stamp(directory, min_year=None, max_cast=None, movie_ids=None):
+    """
+    Returns a string identifying the data `load_data` loads for these
+    arguments: the (mtime_ns, size) of each CSV file and the filters,
+    with the allowed movie ids reduced to a digest.
+    """
+    if movie_ids is not None:
+        movie_ids = hashlib.sha256(
+            "\n".join(sorted(movie_ids)).encode("utf-8")
+        ).hexdigest()
+    return json.dumps({
+        "sources": source_stamps(directory),
+        "min_year": min_year,
+        "max_cast": max_cast,
+        "movie_ids": movie_ids,
+    }, sort_keys=True)
+
+
+def _year_at_least(year, min_year):
+    """
+    Returns whether a CSV year field is a year no earlier than `min_year`.
+    """
+    try:
+        return int(year) >= min_year
+    except ValueError:
+        return False
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--dict", action="store_true",
+                        help="load into dictionaries instead of a snapshot")
+    parser.add_argument("--costar-index", action="store_true",
+                        help="precompute deduplicated co-stars "
+                             "(with --dict)")
+    parser.add_argument("--min-year", type=int,
+                        help="only load movies from this year on")
+    parser.add_argument("--max-cast", type=int,
+                        help="only load movies with at most this many stars")
+    parser.add_argument("--movies", metavar="FILE",
+                        help="only load the movie ids listed in FILE, "
+                             "one per line")
+    parser.add_argument("--landmarks", metavar="FILE",
+                        help="landmark index for bounds and guided search, "
+                             "built and saved to FILE if it does not exist")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer CSV name pairs from FILE ('-' for stdin) "
+                           "as JSON lines")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer queries over HTTP on localhost")
+    args = parser.parse_args()
+
+    # Batch output goes to stdout, so keep progress messages off it
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    movie_ids = None
+    if args.movies:
+        with open(args.movies, encoding="utf-8") as f:
+            movie_ids = {line.strip() for line in f if line.strip()}
+    dropped = load_data(args.directory, compact=not args.dict,
+                        min_year=args.min_year, max_cast=args.max_cast,
+                        movie_ids=movie_ids)
+    if dropped:
+        for reason, count in dropped.items():
+            if count:
+                print(f"Dropped {count} {reason.replace('_', ' ')}.", file=log)
+    if args.costar_index and args.dict:
+        build_costar_index()
+    if args.landmarks:
+        load_landmarks(args.landmarks)
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout)
+        return
+    if args.serve:
+        run_server(args.serve)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +302,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if landmark_index is not None:
+        path = shortest_path(source, target, landmarks=landmark_index)
+    else:
+        path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -78,28 +314,41 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_for_id(path[i][1])["name"]
+            person2 = person_for_id(path[i + 1][1])["name"]
+            movie = movie_for_id(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, landmarks=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is true, the search grows frontiers from both
+    the source and the target and stops where they meet. If a
+    LandmarkIndex is given as `landmarks`, an A* search guided and
+    pruned by its distance bounds is used instead.
+
     If no possible path, returns None.
     """
 
+    if landmarks is not None:
+        return landmarks.shortest_path(source, target, neighbors_for_person)
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+
 
     #initializing the start node and frontier to start the search algorithm 
 
+    reset_search_stats()
     path = []
     start_node = Node(person=source, parent=None, movie=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start_node)
-    visited = set()
+    visited = {source}
 
     if source == target:
         return path
@@ -109,9 +358,9 @@ def shortest_path(source, target):
             return None
         
         node = frontier.remove()
-        pairs = neighbors_for_person(node.person)
+        search_stats["nodes_expanded"] += 1
 
-        for movie, person in pairs:
+        for movie, person in unvisited_neighbors(node.person, visited):
             if person == target:
                 path_node = Node(person=person, parent=node, movie=movie)
                 while path_node.parent is not None:
@@ -122,23 +371,218 @@ def shortest_path(source, target):
                        
             # creating a new node and adding it to the frontier
 
-            if person not in visited:
-                new_node = Node(person=person, parent=node, movie=movie)
-                frontier.add(new_node)
-                visited.add(new_node.person)
-            else:
-                continue
-            
+            new_node = Node(person=person, parent=node, movie=movie)
+            frontier.add(new_node)
+            visited.add(new_node.person)
+
 
     # TODO
     raise NotImplementedError
 
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once.
+
+    If no possible path, returns None.
+    """
+    reset_search_stats()
+    if source == target:
+        return []
+
+    # Each side maps a reached person to the (movie_id, person_id) step
+    # that leads back towards the side's own root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Always grow the smaller frontier by one full level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        # Finish the whole level before stopping, so that the meeting
+        # point closest to the other side's root is the one used
+        meeting = None
+        next_frontier = []
+        for person in frontier:
+            search_stats["nodes_expanded"] += 1
+            for movie, neighbor in unvisited_neighbors(person, parents):
+                parents[neighbor] = (movie, person)
+                next_frontier.append(neighbor)
+                if neighbor in others and (
+                    meeting is None
+                    or _depth(others, neighbor) < _depth(others, meeting)
+                ):
+                    meeting = neighbor
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _depth(parents, person):
+    """
+    Returns the number of steps from `person` back to the root
+    of the search tree described by `parents`.
+    """
+    depth = 0
+    while parents[person] is not None:
+        person = parents[person][1]
+        depth += 1
+    return depth
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds the source-to-target path through `meeting` from the
+    parent pointers of a bidirectional search.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, child = backward[person]
+        path.append((movie, child))
+        person = child
+    return path
+
+
+@functools.lru_cache(maxsize=TREE_CACHE_SIZE)
+def search_tree(source):
+    """
+    Returns the SearchTree of a full breadth-first search from `source`.
+
+    The most recently used trees are cached, so later queries from
+    the same source need no searching at all.
+    """
+    if graph is not None:
+        return graph.search_tree(source)
+    _, parents = single_source_bfs(source)
+    return SearchTree(source, parents)
+
+
+def query_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs from
+    `source` to `target` for a batch or server query, or None.
+
+    The first query from a source is answered by a bidirectional
+    search, which stops as soon as the target is found. Only once the
+    same source comes up again is its full search tree built, and
+    cached for every query after that.
+    """
+    with queried_sources_lock:
+        repeated = source in queried_sources
+        if not repeated:
+            queried_sources[source] = None
+            if len(queried_sources) > QUERIED_SOURCES_SIZE:
+                del queried_sources[next(iter(queried_sources))]
+    if repeated:
+        return search_tree(source).path_to(target)
+    return shortest_path(source, target, bidirectional=True)
+
+
+def single_source_bfs(source):
+    """
+    Runs a breadth-first search from `source` to everyone it can reach.
+
+    Returns a (distances, parents) pair of dictionaries: `distances`
+    maps each reachable person_id to their degrees of separation from
+    the source, and `parents` maps it to the (movie_id, person_id) step
+    leading back towards the source (None for the source itself).
+    """
+    if graph is not None:
+        depths, parent_person, parent_movie = breadth_first(
+            graph.person_offsets, graph.person_movies,
+            graph.movie_offsets, graph.movie_stars,
+            graph.person_index(source)
+        )
+        distances, parents = {}, {}
+        for person, depth in enumerate(depths):
+            if depth == -1:
+                continue
+            person_id = graph.person_ids[person]
+            distances[person_id] = depth
+            if depth == 0:
+                parents[person_id] = None
+            else:
+                parents[person_id] = (
+                    graph.movie_ids[parent_movie[person]],
+                    graph.person_ids[parent_person[person]],
+                )
+        return distances, parents
+
+    reset_search_stats()
+    distances = {source: 0}
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            search_stats["nodes_expanded"] += 1
+            for movie, neighbor in unvisited_neighbors(person, parents):
+                distances[neighbor] = distances[person] + 1
+                parents[neighbor] = (movie, person)
+                next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances, parents
+
+
+class SearchTree():
+    """
+    Breadth-first search tree mapping every person reachable from
+    `root` to the (movie_id, person_id) step leading back towards it.
+    """
+
+    def __init__(self, root, parents):
+        self.root = root
+        self.parents = parents
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        from the root to `target`, or None if it is unreachable.
+        """
+        if target not in self.parents:
+            return None
+        path = []
+        while target != self.root:
+            movie, parent = self.parents[target]
+            path.append((movie, target))
+            target = parent
+        path.reverse()
+        return path
+
+
 class Node():
     def __init__(self, person, parent, movie):
         self.person = person
         self.parent = parent
         self.movie = movie
 
+    @property
+    def state(self):
+        return self.person
+
 
 class StackFrontier():
     def __init__(self):
@@ -177,13 +621,13 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_for_id(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -198,18 +642,339 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns a list of the IMDB ids of everyone with a given name.
+
+    A birth year in parentheses after the name, as in
+    "Kevin Bacon (1958)", keeps only people born that year.
+    """
+    name, birth = split_birth(name)
+    if graph is not None:
+        person_ids = sorted(graph.person_ids_for_name(name))
+    else:
+        person_ids = sorted(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [
+            person_id for person_id in person_ids
+            if person_for_id(person_id)["birth"] == birth
+        ]
+    return person_ids
+
+
+def candidates_for_name(name, limit=CANDIDATES):
+    """
+    Returns up to `limit` people ranked by how well their name matches
+    a possibly misspelled or partial `name`, as dictionaries with
+    their id, name, birth and match score.
+
+    People born in a year given in parentheses after the name
+    rank first.
+    """
+    global name_index
+
+    if name_index is None:
+        if graph is not None:
+            name_index = NameIndex(graph.person_ids, graph.person_names,
+                                   graph.person_births)
+        else:
+            person_ids = list(people)
+            name_index = NameIndex(
+                person_ids,
+                [people[person_id]["name"] for person_id in person_ids],
+                [people[person_id]["birth"] for person_id in person_ids],
+            )
+
+    name, birth = split_birth(name)
+    return [
+        {"id": person_id, "name": name, "birth": birth, "score": score}
+        for person_id, name, birth, score
+        in name_index.search(name, birth=birth, limit=limit)
+    ]
+
+
+def resolve_name(name):
+    """
+    Non-interactive counterpart of `person_id_for_name`.
+
+    Returns a (person_id, None) pair if `name` names exactly one person,
+    and otherwise (None, error) where `error` is a dictionary saying
+    whether the name was ambiguous or not found, with ranked candidates.
+    """
+    person_ids = person_ids_for_name(name)
+    if len(person_ids) == 1:
+        return person_ids[0], None
+
+    if person_ids:
+        candidates = [
+            candidate for candidate in candidates_for_name(
+                name, limit=max(CANDIDATES, len(person_ids))
+            )
+            if candidate["id"] in person_ids
+        ]
+        return None, {"error": "ambiguous", "name": name,
+                      "candidates": candidates}
+    return None, {"error": "not found", "name": name,
+                  "candidates": candidates_for_name(name)}
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
+            search_stats["tuples_allocated"] += 1
     return neighbors
 
 
+def unvisited_neighbors(person_id, visited):
+    """
+    Yields (movie_id, person_id) pairs for co-stars of a given person
+    who are not in `visited`, each co-star at most once.
+
+    People are checked against `visited` before any pair is built for
+    them, and callers are expected to mark each yielded person visited
+    before asking for the next one.
+    """
+    if costar_index is not None:
+        pairs = costar_index[person_id]
+    elif len(people[person_id]["movies"]) >= HOT_ACTOR_MOVIES:
+        pairs = hot_costars(person_id)
+    else:
+        for movie_id in people[person_id]["movies"]:
+            for star in movies[movie_id]["stars"]:
+                if star not in visited:
+                    search_stats["tuples_allocated"] += 1
+                    yield movie_id, star
+        return
+
+    for pair in pairs:
+        if pair[1] not in visited:
+            yield pair
+
+
+def costars_for_person(person_id):
+    """
+    Returns a tuple of (movie_id, person_id) pairs with one entry
+    for each person who starred with a given person, excluding
+    the person themself.
+    """
+    costars = {}
+    for movie_id in people[person_id]["movies"]:
+        for star in movies[movie_id]["stars"]:
+            if star != person_id and star not in costars:
+                costars[star] = movie_id
+    search_stats["tuples_allocated"] += len(costars)
+    return tuple((movie_id, star) for star, movie_id in costars.items())
+
+
+@functools.lru_cache(maxsize=COSTAR_CACHE_SIZE)
+def hot_costars(person_id):
+    """
+    Returns `costars_for_person`, cached for the most recently
+    searched people with many movies.
+    """
+    return costars_for_person(person_id)
+
+
+def build_costar_index():
+    """
+    Precomputes the deduplicated co-stars of everyone, so that
+    searches over the dictionaries allocate no pairs at all.
+    """
+    global costar_index
+    costar_index = {
+        person_id: costars_for_person(person_id) for person_id in people
+    }
+
+
+def load_landmarks(path, k=16):
+    """
+    Loads the landmark index at `path` into `landmark_index`, building
+    it from the loaded data with `k` landmarks and saving it first if
+    there is no such file yet.
+
+    A saved index built from other CSV files or with other filters
+    would give wrong bounds, so it is rebuilt and overwritten too.
+    """
+    global landmark_index
+
+    if os.path.exists(path):
+        try:
+            index = LandmarkIndex.load(path)
+        except (ValueError, IndexError, EOFError, struct.error):
+            index = None
+        if index is not None and index.dataset == dataset:
+            landmark_index = index
+            return
+    if graph is not None:
+        person_ids = graph.person_ids
+    else:
+        person_ids = people
+    landmark_index = LandmarkIndex.build(person_ids, neighbors_for_person, k,
+                                         dataset=dataset)
+    landmark_index.save(path)
+
+
+def separation_bounds(source, target):
+    """
+    Returns a (lower, upper) estimate of the degrees of separation
+    between two person_ids from the loaded landmark index, with `upper`
+    None if unknown. Returns None if they are known not to be connected.
+    """
+    if landmark_index is None:
+        return (0, None)
+    return landmark_index.bounds(source, target)
+
+
+def reset_search_stats():
+    """
+    Zeroes the counters in `search_stats` before a new search.
+    """
+    for counter in search_stats:
+        search_stats[counter] = 0
+
+
+def person_for_id(person_id):
+    """
+    Returns a dictionary with the name and birth year of a person.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_for_id(movie_id):
+    """
+    Returns a dictionary with the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
+def answer_query(source_name, target_name):
+    """
+    Returns a JSON-serializable dictionary answering how `source_name`
+    and `target_name` are connected, without prompting for anything.
+    """
+    result = {"source": source_name, "target": target_name}
+
+    person_ids = []
+    for name in (source_name, target_name):
+        person_id, error = resolve_name(name)
+        if error is not None:
+            result.update(error)
+            return result
+        person_ids.append(person_id)
+
+    source, target = person_ids
+    if landmark_index is not None:
+        bounds = separation_bounds(source, target)
+        result["bounds"] = None if bounds is None else list(bounds)
+    path = query_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": movie_for_id(movie_id)["title"],
+            "person_id": person_id,
+            "person": person_for_id(person_id)["name"],
+        }
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def answer_bounds(source_name, target_name):
+    """
+    Returns a JSON-serializable dictionary with the landmark bounds on
+    the degrees of separation between two names, without searching.
+    """
+    result = {"source": source_name, "target": target_name}
+    person_ids = []
+    for name in (source_name, target_name):
+        person_id, error = resolve_name(name)
+        if error is not None:
+            result.update(error)
+            return result
+        person_ids.append(person_id)
+    bounds = separation_bounds(*person_ids)
+    result["bounds"] = None if bounds is None else list(bounds)
+    return result
+
+
+def run_batch(lines, out):
+    """
+    Answers every `source,target` CSV row read from `lines`, writing
+    one JSON object per row to `out` as soon as it is known.
+    """
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        if len(row) != 2:
+            result = {"error": "expected two names", "row": row}
+        else:
+            result = answer_query(row[0].strip(), row[1].strip())
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers `GET /path?source=NAME&target=NAME` with the JSON result
+    of `answer_query`, and `GET /bounds?source=NAME&target=NAME` with
+    just the landmark estimate.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if (url.path not in ("/path", "/bounds")
+                or "source" not in params or "target" not in params):
+            self.send_json(400, {"error": "use /path?source=NAME&target=NAME"})
+            return
+        source, target = params["source"][0], params["target"][0]
+        if url.path == "/bounds":
+            self.send_json(200, answer_bounds(source, target))
+        else:
+            self.send_json(200, answer_query(source, target))
+
+    def send_json(self, status, result):
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_server(port):
+    """
+    Serves queries over HTTP on localhost until interrupted,
+    keeping the loaded graph resident between requests.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+    print(f"Serving on http://127.0.0.1:{port}/path?source=NAME&target=NAME")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     main()
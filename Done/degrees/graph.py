@@ -0,0 +1,440 @@
+import csv
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class CompactGraph():
+    """
+    Star graph between people and movies with every id interned to a
+    dense integer and adjacency stored as CSR arrays.
+
+    The movies of person `i` are
+    `person_movies[person_offsets[i]:person_offsets[i + 1]]`, and the
+    stars of movie `j` are
+    `movie_stars[movie_offsets[j]:movie_offsets[j + 1]]`.
+
+    Ids and names are looked up by binary search over the permutations
+    `person_order`, `movie_order` and `name_order`, so no per-string
+    dictionaries have to be built before the first query.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order=None, movie_order=None, name_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        if person_order is None:
+            person_order = _order(person_ids)
+        if movie_order is None:
+            movie_order = _order(movie_ids)
+        if name_order is None:
+            name_order = _order(person_names, key=str.lower)
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph straight from the CSV files in `directory`,
+        without going through the dictionaries used by `load_data`.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Collect edges as parallel integer arrays, skipping dangling ids
+        edge_people, edge_movies = array("i"), array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is None or movie is None:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        person_offsets, person_movies = _csr(
+            edge_people, edge_movies, len(person_ids)
+        )
+        movie_offsets, movie_stars = _csr(
+            edge_movies, edge_people, len(movie_ids)
+        )
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dictionaries
+        filled in by `load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # `load_data` can leave ids of unknown movies in a person's set
+        edge_people, edge_movies = array("i"), array("i")
+        for person, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                movie = movie_index.get(movie_id)
+                if movie is None:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        person_offsets, person_movies = _csr(
+            edge_people, edge_movies, len(person_ids)
+        )
+        movie_offsets, movie_stars = _csr(
+            edge_movies, edge_people, len(movie_ids)
+        )
+        return cls(person_ids,
+                   [people[person_id]["name"] for person_id in person_ids],
+                   [people[person_id]["birth"] for person_id in person_ids],
+                   movie_ids,
+                   [movies[movie_id]["title"] for movie_id in movie_ids],
+                   [movies[movie_id]["year"] for movie_id in movie_ids],
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index of a person id.
+
+        Raises KeyError if the id is unknown.
+        """
+        return _find(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index of a movie id.
+
+        Raises KeyError if the id is unknown.
+        """
+        return _find(self.movie_order, self.movie_ids, movie_id)
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the set of person ids whose name matches `name`,
+        ignoring case.
+        """
+        names = self.person_names
+        key = name.lower()
+        lo = bisect_left(self.name_order, key,
+                         key=lambda i: names[i].lower())
+        hi = bisect_right(self.name_order, key, lo=lo,
+                          key=lambda i: names[i].lower())
+        return {self.person_ids[self.name_order[k]] for k in range(lo, hi)}
+
+    def person(self, person_id):
+        """
+        Returns the name and birth year of a person.
+        """
+        i = self.person_index(person_id)
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns the title and year of a movie.
+        """
+        j = self.movie_index(movie_id)
+        return {"title": self.movie_titles[j], "year": self.movie_years[j]}
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person index starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices starring in a movie index.
+        """
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_of(self.person_index(person_id)):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def shortest_path(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+        source = self.person_index(source)
+        target = self.person_index(target)
+        if bidirectional:
+            return self._bidirectional_path(source, target)
+
+        # Parent person and movie of every reached person, -1 if unreached
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        parent_person[source] = source
+
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    for star in self.stars_of(movie):
+                        if parent_person[star] != -1:
+                            continue
+                        parent_person[star] = person
+                        parent_movie[star] = movie
+                        if star == target:
+                            path = self._walk(target, parent_person,
+                                              parent_movie, source)
+                            path.reverse()
+                            return path
+                        next_frontier.append(star)
+            frontier = next_frontier
+        return None
+
+    def search_tree(self, source):
+        """
+        Returns the CompactSearchTree of a full breadth-first search
+        from a person id.
+        """
+        root = self.person_index(source)
+        _, parent_person, parent_movie = breadth_first(
+            self.person_offsets, self.person_movies,
+            self.movie_offsets, self.movie_stars, root
+        )
+        return CompactSearchTree(self, root, parent_person, parent_movie)
+
+    def _bidirectional_path(self, source, target):
+        """
+        Bidirectional breadth-first search between two person indices.
+        """
+        n = len(self.person_ids)
+        sides = []
+        for root in (source, target):
+            parent_person = array("i", [-1]) * n
+            parent_movie = array("i", [-1]) * n
+            depth = array("i", [-1]) * n
+            parent_person[root] = root
+            depth[root] = 0
+            sides.append((parent_person, parent_movie, depth, [root]))
+
+        while sides[0][3] and sides[1][3]:
+            side = 0 if len(sides[0][3]) <= len(sides[1][3]) else 1
+            parent_person, parent_movie, depth, frontier = sides[side]
+            other_depth = sides[1 - side][2]
+
+            meeting = -1
+            next_frontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    for star in self.stars_of(movie):
+                        if depth[star] != -1:
+                            continue
+                        parent_person[star] = person
+                        parent_movie[star] = movie
+                        depth[star] = depth[person] + 1
+                        next_frontier.append(star)
+                        if other_depth[star] != -1 and (
+                            meeting == -1
+                            or other_depth[star] < other_depth[meeting]
+                        ):
+                            meeting = star
+
+            if meeting != -1:
+                forward, backward = sides[0], sides[1]
+                path = self._walk(meeting, forward[0], forward[1], source)
+                path.reverse()
+                person = meeting
+                while person != target:
+                    movie = backward[1][person]
+                    person = backward[0][person]
+                    path.append((self.movie_ids[movie], self.person_ids[person]))
+                return path
+
+            sides[side] = (parent_person, parent_movie, depth, next_frontier)
+
+        return None
+
+    def _walk(self, person, parent_person, parent_movie, root):
+        """
+        Returns the (movie_id, person_id) steps from `person` back to
+        `root`, nearest first.
+        """
+        path = []
+        while person != root:
+            path.append((self.movie_ids[parent_movie[person]],
+                         self.person_ids[person]))
+            person = parent_person[person]
+        return path
+
+
+class CompactSearchTree():
+    """
+    Breadth-first search tree over a CompactGraph, stored as arrays of
+    parent person and movie indices.
+    """
+
+    def __init__(self, graph, root, parent_person, parent_movie):
+        self.graph = graph
+        self.root = root
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        from the root to `target`, or None if it is unreachable.
+        """
+        try:
+            target = self.graph.person_index(target)
+        except KeyError:
+            return None
+        if self.parent_person[target] == -1:
+            return None
+        path = self.graph._walk(target, self.parent_person,
+                                self.parent_movie, self.root)
+        path.reverse()
+        return path
+
+
+def breadth_first(person_offsets, person_movies, movie_offsets, movie_stars,
+                  root):
+    """
+    Runs a full breadth-first search from person index `root` over
+    CSR adjacency arrays.
+
+    Returns (depth, parent_person, parent_movie) arrays indexed by
+    person, holding -1 for everyone who cannot be reached.
+    """
+    n = len(person_offsets) - 1
+    depth = array("i", [-1]) * n
+    parent_person = array("i", [-1]) * n
+    parent_movie = array("i", [-1]) * n
+    depth[root] = 0
+    parent_person[root] = root
+
+    level = 0
+    frontier = [root]
+    while frontier:
+        level += 1
+        next_frontier = []
+        for person in frontier:
+            for movie in person_movies[
+                person_offsets[person]:person_offsets[person + 1]
+            ]:
+                for star in movie_stars[
+                    movie_offsets[movie]:movie_offsets[movie + 1]
+                ]:
+                    if depth[star] == -1:
+                        depth[star] = level
+                        parent_person[star] = person
+                        parent_movie[star] = movie
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return depth, parent_person, parent_movie
+
+
+def _csr(rows, cols, n):
+    """
+    Groups parallel `rows`/`cols` edge arrays by row, returning
+    (offsets, values) arrays in compressed sparse row layout.
+    """
+    offsets = array("i", [0]) * (n + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    values = array("i", [0]) * len(cols)
+    position = offsets[:-1]
+    for row, col in zip(rows, cols):
+        values[position[row]] = col
+        position[row] += 1
+    return offsets, values
+
+
+def _order(values, key=None):
+    """
+    Returns an array of the indices of `values` in sorted order.
+    """
+    if key is None:
+        return array("i", sorted(range(len(values)), key=values.__getitem__))
+    return array("i", sorted(range(len(values)),
+                             key=lambda i: key(values[i])))
+
+
+def _find(order, values, value):
+    """
+    Returns the index `i` with `values[i] == value`, searching the
+    sorted permutation `order`.
+    """
+    k = bisect_left(order, value, key=values.__getitem__)
+    if k < len(order) and values[order[k]] == value:
+        return order[k]
+    raise KeyError(value)
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus an
+    array of byte offsets, so it can live in a memory-mapped file.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        position = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            position += len(chunk)
+            offsets.append(position)
+        return cls(offsets, b"".join(chunks))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
@@ -0,0 +1,222 @@
+import heapq
+import struct
+from array import array
+
+MAGIC = b"LANDMARK"
+VERSION = 2
+
+# Magic, version, number of people, number of landmarks, id blob size,
+# then the size of the dataset stamp that follows the header
+HEADER = struct.Struct("<8sIiiqq")
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few well-connected landmark people
+    to everyone else, stored as one byte per person per landmark.
+
+    By the triangle inequality, for any landmark L,
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t),
+    which gives instant bounds and an admissible A* heuristic.
+
+    `dataset` is an opaque string saved with the index identifying the
+    data it was built from, so that a caller can tell a stale index.
+    """
+
+    def __init__(self, person_ids, landmarks, distances, dataset=None):
+        self.person_ids = person_ids
+        self.landmarks = landmarks
+        self.distances = distances
+        self.dataset = dataset
+        self.index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    @classmethod
+    def build(cls, person_ids, neighbors_for_person, k=16, dataset=None):
+        """
+        Builds an index over `person_ids`, using the `k` people with the
+        most co-stars as landmarks.
+
+        `neighbors_for_person` is the function returning a person's
+        (movie_id, person_id) neighbor pairs, and `dataset` the stamp
+        of the data they come from.
+        """
+        person_ids = list(person_ids)
+        index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        costars = {
+            person_id: len({
+                neighbor for _, neighbor in neighbors_for_person(person_id)
+            })
+            for person_id in person_ids
+        }
+        landmarks = sorted(person_ids, key=costars.get, reverse=True)[:k]
+
+        distances = []
+        for landmark in landmarks:
+            column = array("B", [UNREACHABLE]) * len(person_ids)
+            column[index[landmark]] = 0
+            frontier = [landmark]
+            depth = 0
+            while frontier and depth < UNREACHABLE - 1:
+                depth += 1
+                next_frontier = []
+                for person in frontier:
+                    for _, neighbor in neighbors_for_person(person):
+                        i = index[neighbor]
+                        if column[i] == UNREACHABLE:
+                            column[i] = depth
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+            distances.append(column)
+
+        return cls(person_ids, landmarks, distances, dataset)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an index written by `save`.
+        """
+        with open(path, "rb") as f:
+            magic, version, n, k, blob_size, dataset_size = HEADER.unpack(
+                f.read(HEADER.size)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a landmark index")
+            dataset = f.read(dataset_size).decode("utf-8") or None
+            person_ids = f.read(blob_size).decode("utf-8").split("\0")
+            if n == 0:
+                person_ids = []
+            landmarks = array("i")
+            landmarks.fromfile(f, k)
+            distances = []
+            for _ in range(k):
+                column = array("B")
+                column.fromfile(f, n)
+                distances.append(column)
+        return cls(person_ids, [person_ids[i] for i in landmarks], distances,
+                   dataset)
+
+    def save(self, path):
+        """
+        Writes the index to `path` in a compact binary form.
+        """
+        blob = "\0".join(self.person_ids).encode("utf-8")
+        dataset = (self.dataset or "").encode("utf-8")
+        landmarks = array("i", [self.index[landmark]
+                                for landmark in self.landmarks])
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.person_ids),
+                                len(self.landmarks), len(blob),
+                                len(dataset)))
+            f.write(dataset)
+            f.write(blob)
+            landmarks.tofile(f)
+            for column in self.distances:
+                column.tofile(f)
+
+    def bounds(self, source, target):
+        """
+        Returns a (lower, upper) pair bounding the degrees of separation
+        between two person ids, with `upper` None if no landmark reaches
+        both. Returns None if the two are known not to be connected.
+        """
+        if source == target:
+            return (0, 0)
+        lower = self._lower_bound(source, self._column(target))
+        if lower is None:
+            return None
+
+        upper = None
+        s, t = self.index.get(source), self.index.get(target)
+        if s is not None and t is not None:
+            for column in self.distances:
+                if column[s] != UNREACHABLE and column[t] != UNREACHABLE:
+                    total = column[s] + column[t]
+                    if upper is None or total < upper:
+                        upper = total
+        return (max(lower, 1), upper)
+
+    def shortest_path(self, source, target, neighbors_for_person):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, found by A* search guided by
+        the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+        bounds = self.bounds(source, target)
+        if bounds is None:
+            return None
+        _, upper = bounds
+        target_column = self._column(target)
+
+        cost = {source: 0}
+        parents = {source: None}
+
+        # Ties on estimated length go to the deeper node first
+        heap = [(bounds[0], 0, source)]
+        while heap:
+            _, depth, person = heapq.heappop(heap)
+            depth = -depth
+            if person == target:
+                path = []
+                while parents[person] is not None:
+                    movie, parent = parents[person]
+                    path.append((movie, person))
+                    person = parent
+                path.reverse()
+                return path
+            if depth > cost[person]:
+                continue
+
+            for movie, neighbor in neighbors_for_person(person):
+                if depth + 1 >= cost.get(neighbor, depth + 2):
+                    continue
+                estimate = self._lower_bound(neighbor, target_column)
+
+                # Skip people proven unable to reach the target, or
+                # unable to reach it within the landmark upper bound
+                if estimate is None:
+                    continue
+                if upper is not None and depth + 1 + estimate > upper:
+                    continue
+                cost[neighbor] = depth + 1
+                parents[neighbor] = (movie, person)
+                heapq.heappush(
+                    heap, (depth + 1 + estimate, -(depth + 1), neighbor)
+                )
+
+        return None
+
+    def _column(self, person_id):
+        """
+        Returns the landmark distances of a person, or None if the
+        person is not in the index.
+        """
+        i = self.index.get(person_id)
+        if i is None:
+            return None
+        return [column[i] for column in self.distances]
+
+    def _lower_bound(self, person_id, target_column):
+        """
+        Returns a lower bound on the distance from a person to the
+        target whose landmark distances are `target_column`, or None
+        if some landmark proves they are not connected.
+        """
+        i = self.index.get(person_id)
+        if i is None or target_column is None:
+            return 0
+        lower = 0
+        for column, to_target in zip(self.distances, target_column):
+            from_person = column[i]
+            if (from_person == UNREACHABLE) != (to_target == UNREACHABLE):
+                return None
+            if from_person != UNREACHABLE:
+                lower = max(lower, abs(from_person - to_target))
+        return lower
@@ -0,0 +1,150 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# Scores of exact and prefix matches, above any trigram similarity
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+
+# Bonus for candidates born in the requested year
+BIRTH_BONUS = 10.0
+
+# Lowest trigram similarity worth offering as a candidate
+MIN_SIMILARITY = 0.2
+
+# Most prefix matches considered for one query
+PREFIX_LIMIT = 200
+
+# Posting list entries counted per query, rarest trigrams first, though
+# at least MIN_TRIGRAMS lists are always read
+TRIGRAM_BUDGET = 5000
+MIN_TRIGRAMS = 3
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over people's names, giving ranked,
+    non-interactive candidate lists for possibly misspelled names.
+    """
+
+    def __init__(self, person_ids, person_names, person_births):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+
+        # Normalized names in sorted order, for exact and prefix lookups
+        normalized = [normalize(name) for name in person_names]
+        self.order = array("i", sorted(range(len(normalized)),
+                                       key=normalized.__getitem__))
+        self.keys = [normalized[i] for i in self.order]
+
+        # Trigram to the people whose normalized name contains it
+        postings = {}
+        sizes = array("B")
+        for person, name in enumerate(normalized):
+            name_trigrams = trigrams(name)
+            sizes.append(min(len(name_trigrams), 255))
+            for trigram in name_trigrams:
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array("i")
+                posting.append(person)
+        self.postings = postings
+        self.sizes = sizes
+
+    def search(self, query, birth=None, limit=10):
+        """
+        Returns up to `limit` (person_id, name, birth, score) tuples for
+        the people best matching `query`, best first.
+
+        Exact matches rank above prefix matches, which rank above names
+        sharing trigrams with the query. If `birth` is given, people
+        born that year rank above everyone else.
+        """
+        query = normalize(query)
+        scores = {}
+
+        # Exact matches, then the first few names extending the query
+        lo = bisect_left(self.keys, query)
+        exact = bisect_right(self.keys, query, lo=lo)
+        for k in range(lo, exact):
+            scores[self.order[k]] = EXACT_SCORE
+        hi = min(bisect_left(self.keys, query + "\uffff", lo=exact),
+                 exact + PREFIX_LIMIT)
+        for k in range(exact, hi):
+            scores[self.order[k]] = (
+                PREFIX_SCORE + len(query) / len(self.keys[k])
+            )
+
+        if len(scores) < limit:
+            self._score_trigrams(query, scores, limit)
+
+        if birth is not None:
+            birth = str(birth)
+            for person in scores:
+                if self.person_births[person] == birth:
+                    scores[person] += BIRTH_BONUS
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [
+            (self.person_ids[person], self.person_names[person],
+             self.person_births[person], score)
+            for person, score in ranked
+        ]
+
+    def _score_trigrams(self, query, scores, limit):
+        """
+        Adds trigram similarity scores to `scores` for people not
+        already in it, reading the rarest posting lists first.
+        """
+        query_trigrams = trigrams(query)
+        postings = sorted(
+            (self.postings[trigram] for trigram in query_trigrams
+             if trigram in self.postings),
+            key=len
+        )
+        counts = Counter()
+        budget = TRIGRAM_BUDGET
+        for read, posting in enumerate(postings):
+            if len(posting) > budget and read >= MIN_TRIGRAMS:
+                break
+            counts.update(posting)
+            budget -= len(posting)
+
+        for person, shared in counts.most_common(limit * 4):
+            if person in scores:
+                continue
+            # Dice coefficient over the trigram sets
+            similarity = (
+                2 * shared / (len(query_trigrams) + self.sizes[person])
+            )
+            if similarity >= MIN_SIMILARITY:
+                scores[person] = similarity
+
+
+def normalize(name):
+    """
+    Returns a name lowercased with runs of whitespace collapsed.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """
+    Returns the set of three-character substrings of a padded name.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def split_birth(name):
+    """
+    Splits a trailing birth year in parentheses off a name, as in
+    "Kevin Bacon (1958)". Returns (name, birth), with birth None if
+    there is no year.
+    """
+    match = re.fullmatch(r"\s*(.*?)\s*\((\d{4})\)\s*", name)
+    if match is None:
+        return name, None
+    return match.group(1), match.group(2)
@@ -0,0 +1,136 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph, StringTable
+
+# Bump whenever the layout below changes, so old snapshots get rebuilt
+VERSION = 1
+
+MAGIC = b"DEGREES\0"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Magic, version, byte order, then (mtime_ns, size) of each source file
+HEADER = struct.Struct("<8sIc3x" + "qq" * len(SOURCES))
+
+# Type code and byte length of the section that follows
+SECTION = struct.Struct("<c7xq")
+
+# Integer arrays of a CompactGraph, in the order they are stored
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "person_order", "movie_order", "name_order")
+
+# String columns of a CompactGraph, in the order they are stored
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+
+def load_graph(directory):
+    """
+    Returns a CompactGraph for the CSV files in `directory`.
+
+    The graph is memory-mapped from the directory's snapshot if one
+    exists for the current CSV files; otherwise it is built from the
+    CSVs and a fresh snapshot is written for next time.
+    """
+    path = os.path.join(directory, FILENAME)
+    stamps = source_stamps(directory)
+
+    graph = read_snapshot(path, stamps)
+    if graph is not None:
+        return graph
+
+    graph = CompactGraph.from_csv(directory)
+    try:
+        write_snapshot(graph, path, stamps)
+    except OSError:
+        # A read-only dataset directory just means no caching
+        pass
+    return graph
+
+
+def source_stamps(directory):
+    """
+    Returns the (mtime_ns, size) of each CSV file the graph is built from.
+    """
+    stamps = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def write_snapshot(graph, path, stamps):
+    """
+    Writes `graph` to `path` as a binary snapshot tagged with the
+    given source file stamps.
+    """
+    sections = []
+    for name in ARRAYS:
+        sections.append(array("i", getattr(graph, name)))
+    for name in STRINGS:
+        table = StringTable.from_strings(getattr(graph, name))
+        sections.append(table.offsets)
+        sections.append(array("B", table.blob))
+
+    # Write next to the destination, then swap it in atomically
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, _byteorder(),
+                            *[value for stamp in stamps for value in stamp]))
+        for section in sections:
+            f.write(SECTION.pack(section.typecode.encode(),
+                                 len(section) * section.itemsize))
+            section.tofile(f)
+            f.write(b"\0" * (-f.tell() % 8))
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, stamps):
+    """
+    Returns the CompactGraph memory-mapped from the snapshot at `path`,
+    or None if there is no usable snapshot for the given source stamps.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    magic, version, byteorder, *values = HEADER.unpack_from(buffer)
+    if (magic != MAGIC or version != VERSION or byteorder != _byteorder()
+            or values != [value for stamp in stamps for value in stamp]):
+        return None
+
+    view = memoryview(buffer)
+    position = HEADER.size
+    sections = []
+    for _ in range(len(ARRAYS) + 2 * len(STRINGS)):
+        # A truncated or corrupt snapshot is rebuilt rather than trusted
+        if position + SECTION.size > len(buffer):
+            return None
+        typecode, size = SECTION.unpack_from(buffer, position)
+        position += SECTION.size
+        if size < 0 or position + size > len(buffer):
+            return None
+        try:
+            section = view[position:position + size].cast(typecode.decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return None
+        sections.append(section)
+        position += size + (-position - size) % 8
+
+    columns = dict(zip(ARRAYS, sections))
+    for i, name in enumerate(STRINGS):
+        offsets, blob = sections[len(ARRAYS) + 2 * i:len(ARRAYS) + 2 * i + 2]
+        columns[name] = StringTable(offsets, blob)
+    return CompactGraph(**columns)
+
+
+def _byteorder():
+    return b"<" if sys.byteorder == "little" else b">"
@@ -0,0 +1,144 @@
+import argparse
+import os
+import random
+from array import array
+from collections import Counter
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import degrees
+from graph import CompactGraph, breadth_first
+
+# CSR arrays of a CompactGraph that workers need for searching
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+
+# Shared memory blocks and array views attached to by each worker process
+_blocks = []
+_arrays = []
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Degrees of separation from people to everyone else."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("names", nargs="*",
+                        help="people to measure from (default: random sample)")
+    parser.add_argument("--sample", type=int, default=100,
+                        help="number of random people when no names are given")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    if args.names:
+        sources = []
+        for name in args.names:
+            person_id = degrees.person_id_for_name(name)
+            if person_id is None:
+                print(f"Person not found: {name}")
+                continue
+            sources.append(person_id)
+    else:
+        person_ids = sorted(degrees.people)
+        sources = random.sample(person_ids, min(args.sample, len(person_ids)))
+
+    results = separation_stats(sources, processes=args.processes)
+    total = Counter()
+    for source in sources:
+        histogram = results[source]
+        total.update(histogram)
+        reachable = sum(histogram.values())
+        name = degrees.person_for_id(source)["name"]
+        print(f"{name} ({source}): {reachable} reachable, "
+              f"average {average(histogram):.3f} degrees")
+
+    print("Path length distribution:")
+    for length in sorted(total):
+        print(f"  {length}: {total[length]}")
+    print(f"Average degrees of separation: {average(total):.3f}")
+
+
+def separation_stats(sources, processes=None):
+    """
+    Runs a breadth-first search from every person_id in `sources`
+    across a pool of worker processes.
+
+    Returns a dictionary mapping each source to a Counter of how many
+    other people are reachable at each degree of separation.
+    """
+    graph = degrees.graph
+    if graph is None:
+        graph = CompactGraph.from_data(degrees.people, degrees.movies)
+    roots = [graph.person_index(source) for source in sources]
+
+    # Copy the adjacency into shared memory once, rather than
+    # pickling the whole graph to every worker
+    blocks = [share(getattr(graph, name)) for name in ARRAYS]
+    try:
+        specs = [
+            (block.name, len(getattr(graph, name)))
+            for block, name in zip(blocks, ARRAYS)
+        ]
+        processes = processes or os.cpu_count()
+        chunksize = max(1, len(roots) // (4 * processes))
+        with Pool(processes, initializer=_attach, initargs=(specs,)) as pool:
+            histograms = pool.map(_histogram, roots, chunksize)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return dict(zip(sources, histograms))
+
+
+def share(values):
+    """
+    Returns a SharedMemory block holding a copy of an integer array.
+    """
+    values = array("i", values)
+    size = max(1, len(values) * values.itemsize)
+    block = SharedMemory(create=True, size=size)
+    block.buf[:len(values) * values.itemsize] = values.tobytes()
+    return block
+
+
+def average(histogram):
+    """
+    Returns the mean degree of separation in a histogram,
+    or 0 if it is empty.
+    """
+    count = sum(histogram.values())
+    if count == 0:
+        return 0
+    return sum(length * n for length, n in histogram.items()) / count
+
+
+def _attach(specs):
+    """
+    Worker initializer that maps the shared CSR arrays read-only.
+    """
+    itemsize = array("i").itemsize
+    for name, length in specs:
+        block = SharedMemory(name=name)
+        _blocks.append(block)
+        view = block.buf[:length * itemsize].cast("i")
+        _arrays.append(view.toreadonly())
+
+
+def _histogram(root):
+    """
+    Returns a Counter of distances from person index `root`
+    to everyone else it can reach.
+    """
+    depth, _, _ = breadth_first(*_arrays, root)
+    histogram = Counter(depth)
+    del histogram[-1]
+    del histogram[0]
+    return histogram
+
+
+if __name__ == "__main__":
+    main()
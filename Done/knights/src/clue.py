@@ -21,10 +21,14 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
-    for symbol in symbols:
-        if model_check(knowledge, symbol):
+    # Ask whether each symbol, and each symbol's negation, is entailed
+    entailed = batch_entails(
+        knowledge, symbols + [Not(symbol) for symbol in symbols]
+    )
+    for symbol, yes, no in zip(symbols, entailed, entailed[len(symbols):]):
+        if yes:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
+        elif not no:
             print(f"{symbol}: MAYBE")
 
 
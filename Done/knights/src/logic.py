@@ -1,5 +1,7 @@
 import itertools
 
+from sat import Solver
+
 
 class Sentence():
 
@@ -225,39 +227,316 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+class CNFCompiler():
+    """
+    Tseitin compiler from sentences to clauses of integer literals.
+
+    Every compound subsentence gets a fresh variable defined equal to
+    it, so the clauses grow linearly with the sentences. Symbols are
+    numbered from 1 in `variables`, and `names` maps each variable back
+    to its symbol name, or None for a defining variable.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.names = [None]
+        self.clauses = []
+        self.cache = {}
+
+    def add(self, sentence):
+        """Adds clauses requiring the sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
         else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equal to the sentence, defining it if new."""
+        if isinstance(sentence, Symbol):
+            variable = self.variables.get(sentence.name)
+            if variable is None:
+                variable = self.variables[sentence.name] = self._new(
+                    sentence.name
+                )
+            return variable
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        literal = self.cache.get(sentence)
+        if literal is not None:
+            return literal
+        if isinstance(sentence, And):
+            literal = self._conjunction(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Or):
+            literal = -self._conjunction(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            literal = -self._conjunction([
+                self.literal(sentence.antecedent),
+                -self.literal(sentence.consequent)
+            ])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self._new()
+            self.clauses.extend([
+                [-literal, -left, right], [-literal, left, -right],
+                [literal, left, right], [literal, -left, -right]
+            ])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.cache[sentence] = literal
+        return literal
+
+    def dimacs(self):
+        """Returns the clauses in DIMACS CNF format."""
+        lines = [f"p cnf {len(self.names) - 1} {len(self.clauses)}"]
+        for clause in self.clauses:
+            lines.append(" ".join(str(literal) for literal in clause) + " 0")
+        return "\n".join(lines) + "\n"
+
+    def _conjunction(self, literals):
+        """Returns a literal defined as the conjunction of literals."""
+        if len(literals) == 1:
+            return literals[0]
+        literal = self._new()
+        for conjunct in literals:
+            self.clauses.append([-literal, conjunct])
+        self.clauses.append([literal] + [-conjunct for conjunct in literals])
+        return literal
+
+    def _new(self, name=None):
+        self.names.append(name)
+        return len(self.names) - 1
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query, using a SAT solver."""
+
+    # Knowledge entails query exactly when knowledge and not query
+    # has no model
+    compiler = CNFCompiler()
+    compiler.add(knowledge)
+    compiler.add(Not(query))
+
+    solver = Solver()
+    for clause in compiler.clauses:
+        solver.add_clause(clause)
+    return not solver.solve()
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that keeps its compiled clauses and SAT solver,
+    with everything the solver has learned, across additions and
+    queries, so each new fact or query only costs its own clauses.
+
+    Sentences given to `push` hold only until the matching `pop`.
+    """
+
+    def __init__(self, *sentences):
+        self.compiler = CNFCompiler()
+        self.solver = Solver()
+        self.flushed = 0
+        self.assumptions = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base for good."""
+        Sentence.validate(sentence)
+        self.compiler.add(sentence)
+        self._flush()
+
+    def push(self, *sentences):
+        """Assumes sentences until the matching call to pop."""
+        for sentence in sentences:
+            Sentence.validate(sentence)
+        literals = [self.compiler.literal(sentence) for sentence in sentences]
+        self._flush()
+        self.assumptions.append(literals)
+
+    def pop(self):
+        """Drops the sentences assumed by the latest call to push."""
+        self.assumptions.pop()
+
+    def satisfiable(self):
+        """Checks if the knowledge base and assumptions have a model."""
+        return self.solver.solve(self._assumed())
+
+    def entails(self, query):
+        """Checks if knowledge base and assumptions entail query."""
+        return self.entails_all([query])[0]
+
+    def entails_all(self, queries):
+        """Returns a list saying whether knowledge base entails each query.
+
+        Every model found rules out each query false in it, and the
+        remaining queries are each settled by one more solve assuming
+        the query false.
+        """
+        literals = [self.compiler.literal(query) for query in queries]
+        self._flush()
+        assumed = self._assumed()
+
+        # An inconsistent knowledge base entails everything
+        if not self.solver.solve(assumed):
+            return [True] * len(literals)
+
+        entails = [None] * len(literals)
+
+        def refute(model):
+            for i, literal in enumerate(literals):
+                # Variables in no clause are missing, and free to be false
+                value = model.get(abs(literal), False)
+                if entails[i] is None and value != (literal > 0):
+                    entails[i] = False
+
+        refute(self.solver.model())
+        for i, literal in enumerate(literals):
+            if entails[i] is None:
+                if self.solver.solve(assumed + [-literal]):
+                    refute(self.solver.model())
+                else:
+                    entails[i] = True
+        return entails
+
+    def _assumed(self):
+        return [literal for literals in self.assumptions
+                for literal in literals]
+
+    def _flush(self):
+        """Passes clauses compiled since the last flush to the solver."""
+        for clause in self.compiler.clauses[self.flushed:]:
+            self.solver.add_clause(clause)
+        self.flushed = len(self.compiler.clauses)
+
+
+def batch_entails(knowledge, queries):
+    """Returns a list saying whether knowledge base entails each query.
+
+    The knowledge base is compiled and solved once, and clauses learned
+    answering one query are kept for the rest.
+    """
+    return KnowledgeBase(knowledge).entails_all(queries)
+
+
+def compile_sentence(sentence, symbols):
+    """Returns a function evaluating a sentence over a bit-packed model.
+
+    Bit i of the model integer holds the value of the symbol named
+    symbols[i]. The sentence is lowered once into a single Python
+    expression, so evaluating a model costs no method calls or dict
+    lookups.
+    """
+    bits = {name: i for i, name in enumerate(symbols)}
+
+    def source(sentence):
+        if isinstance(sentence, Symbol):
+            if sentence.name not in bits:
+                raise Exception(f"variable {sentence.name} not in model")
+            return f"(model >> {bits[sentence.name]} & 1)"
+        if isinstance(sentence, Not):
+            return f"(not {source(sentence.operand)})"
+        if isinstance(sentence, And):
+            if not sentence.conjuncts:
+                return "True"
+            return "(" + " and ".join(
+                source(conjunct) for conjunct in sentence.conjuncts
+            ) + ")"
+        if isinstance(sentence, Or):
+            if not sentence.disjuncts:
+                return "False"
+            return "(" + " or ".join(
+                source(disjunct) for disjunct in sentence.disjuncts
+            ) + ")"
+        if isinstance(sentence, Implication):
+            return (f"(not {source(sentence.antecedent)} "
+                    f"or {source(sentence.consequent)})")
+        if isinstance(sentence, Biconditional):
+            return (f"((not {source(sentence.left)}) "
+                    f"== (not {source(sentence.right)}))")
+        raise TypeError("must be a logical sentence")
+
+    # The expression holds only integers and operators, never names
+    return eval(f"lambda model: bool({source(sentence)})")
+
+
+def model_check_enumerate(knowledge, query):
+    """Checks if knowledge base entails query by enumerating models."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = compile_sentence(knowledge, symbols)
+    query = compile_sentence(query, symbols)
+
+    # Every model of the knowledge base must also be a model of query
+    return all(
+        query(model)
+        for model in range(2 ** len(symbols))
+        if knowledge(model)
+    )
+
+
+def model_check_bitset(knowledge, query):
+    """Checks entailment over all models at once; returns (entails, count).
+
+    Each sentence becomes an integer with one bit per model, built with
+    word-parallel bitwise operations on columns of symbol values, so no
+    model is visited on its own. Count is the number of models of the
+    knowledge base. Memory is 2^n bits per intermediate result, which
+    suits up to about 25 symbols.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    size = 2 ** len(symbols)
+    mask = (1 << size) - 1
+
+    # Bit m of a symbol's column is bit i of model m
+    columns = {}
+    for i, name in enumerate(symbols):
+        width = 2 ** (i + 1)
+        column = ((1 << (width // 2)) - 1) << (width // 2)
+        while width < size:
+            column |= column << width
+            width *= 2
+        columns[name] = column
+
+    cache = {}
+
+    def table(sentence):
+        """Returns the bits of the models in which sentence is true."""
+        if isinstance(sentence, Symbol):
+            return columns[sentence.name]
+        if sentence in cache:
+            return cache[sentence]
+        if isinstance(sentence, Not):
+            bits = mask ^ table(sentence.operand)
+        elif isinstance(sentence, And):
+            bits = mask
+            for conjunct in sentence.conjuncts:
+                bits &= table(conjunct)
+        elif isinstance(sentence, Or):
+            bits = 0
+            for disjunct in sentence.disjuncts:
+                bits |= table(disjunct)
+        elif isinstance(sentence, Implication):
+            bits = (mask ^ table(sentence.antecedent)) | table(
+                sentence.consequent
+            )
+        elif isinstance(sentence, Biconditional):
+            bits = mask ^ (table(sentence.left) ^ table(sentence.right))
+        else:
+            raise TypeError("must be a logical sentence")
+        cache[sentence] = bits
+        return bits
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    models = table(knowledge)
+    return models & ~table(query) == 0, models.bit_count()
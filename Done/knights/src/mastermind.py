@@ -51,6 +51,6 @@ knowledge.add(And(
     Not(Symbol("yellow3"))
 ))
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+for symbol, entails in zip(symbols, batch_entails(knowledge, symbols)):
+    if entails:
         print(symbol)
@@ -50,6 +50,6 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+for symbol, entails in zip(symbols, batch_entails(knowledge, symbols)):
+    if entails:
         print(symbol)
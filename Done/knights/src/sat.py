@@ -0,0 +1,244 @@
+class Solver():
+    """
+    CDCL satisfiability solver over clauses of integer literals, where
+    variable v appears as v when true and -v when false.
+
+    Uses unit propagation over two watched literals per clause, learns
+    a first-UIP clause from every conflict and picks decisions by
+    variable activity with saved phases.
+    """
+
+    # Activity decay per conflict, and conflicts before the first restart
+    DECAY = 0.95
+    RESTART = 100
+
+    def __init__(self):
+        self.clauses = []
+        self.learned = []
+        self.watches = {}
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.increment = 1.0
+        self.ok = True
+        self.conflicts = 0
+        self.decisions = 0
+
+    def add_clause(self, literals):
+        """Adds a clause; returns False if the clauses are unsatisfiable."""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        clause = []
+        for literal in dict.fromkeys(literals):
+            if -literal in clause:
+                return True
+            self._grow(abs(literal))
+            value = self._value(literal)
+            if value is True:
+                return True
+            if value is None:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self.clauses.append(clause)
+            self._watch(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses are satisfiable with every literal
+        in assumptions true, False otherwise."""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        for literal in assumptions:
+            self._grow(abs(literal))
+        restart = self.RESTART
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self._watch(learned)
+                    self._assign(learned[0], learned)
+                self.increment /= self.DECAY
+                continue
+
+            if conflicts >= restart:
+                self._backtrack(0)
+                restart = int(restart * 1.5)
+                conflicts = 0
+
+            # Decide each assumption first, one per decision level
+            if len(self.trail_limits) < len(assumptions):
+                literal = assumptions[len(self.trail_limits)]
+                value = self._value(literal)
+                if value is False:
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self._assign(literal, None)
+                continue
+
+            variable = self._decide()
+            if variable is None:
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self._assign(variable if self.phases[variable] else -variable,
+                         None)
+
+    def model(self):
+        """Returns the last satisfying assignment as {variable: bool}."""
+        return {
+            variable: bool(value)
+            for variable, value in enumerate(self.values)
+            if variable and value is not None
+        }
+
+    def _grow(self, variable):
+        while len(self.values) <= variable:
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+
+    def _value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value == (literal > 0)
+
+    def _watch(self, clause):
+        for literal in clause[:2]:
+            self.watches.setdefault(literal, []).append(clause)
+
+    def _assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """Propagates unit clauses; returns a conflicting clause or None."""
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false_literal, [])
+            kept = []
+            for i, clause in enumerate(watching):
+                # Keep the literal that just became false second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self._value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Move the watch to any literal that is not false
+                for k in range(2, len(clause)):
+                    if self._value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self._value(clause[0]) is False:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false_literal] = kept
+                        self.head = len(self.trail)
+                        return clause
+                    self._assign(clause[0], clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """Returns (learned clause, level to backtrack to) for a conflict."""
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        clause = conflict
+        index = len(self.trail) - 1
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.levels[variable] > 0:
+                    seen.add(variable)
+                    self._bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve on the latest seen literal of this level
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        # Watch the highest-level literal second, to assert after backjump
+        backjump = 0
+        for k in range(1, len(learned)):
+            if self.levels[abs(learned[k])] > backjump:
+                backjump = self.levels[abs(learned[k])]
+                learned[1], learned[k] = learned[k], learned[1]
+        return learned, backjump
+
+    def _bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def _decide(self):
+        """Returns the unassigned variable with the highest activity."""
+        best = None
+        for variable in range(1, len(self.values)):
+            if self.values[variable] is None and (
+                best is None or self.activity[variable] > self.activity[best]
+            ):
+                best = variable
+        return best
+
+    def _backtrack(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
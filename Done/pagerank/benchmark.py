@@ -0,0 +1,298 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import outofcore
+import pagerank
+import sampling
+import solvers
+from pagerank import DAMPING, SAMPLES
+from sparse import LinkMatrix, power_iteration
+
+SIZES = [10 ** k for k in range(2, 7)]
+
+# Average links per page in generated corpora
+MEAN_LINKS = 8
+
+# Share of pages with no links in power-law corpora
+DANGLING = 0.1
+
+# Tolerance of the reference ranks errors are measured against
+REFERENCE_TOLERANCE = 1e-12
+
+# L1 error a sampler must reach for the samples needed to be reported,
+# and the most samples tried to reach it
+TARGET_ERROR = 0.05
+MAX_SAMPLES = 10 ** 7
+
+FIELDS = ["graph", "pages", "links", "engine", "seconds", "peak_bytes",
+          "l1_error", "samples"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time PageRank engines on generated corpora."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--graphs", nargs="+", default=list(GRAPHS),
+                        choices=list(GRAPHS))
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES),
+                        choices=list(ENGINES))
+    parser.add_argument("--target-error", type=float, default=TARGET_ERROR)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for graph in args.graphs:
+        for n in args.sizes:
+            print(f"{graph} corpus of {n} pages...", file=sys.stderr)
+            results.extend(run_benchmarks(graph, n, args.engines,
+                                          args.target_error, args.seed))
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            writer = csv.DictWriter(output, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump({
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "results": results,
+            }, output, indent=2)
+            output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def random_corpus(n, rng):
+    """
+    Returns a LinkMatrix of `n` pages, each with a Poisson number of
+    links to pages chosen uniformly.
+    """
+    degree = rng.poisson(MEAN_LINKS, n)
+    sources = np.repeat(np.arange(n), degree)
+    targets = rng.integers(n, size=len(sources))
+    return _matrix(n, sources, targets)
+
+
+def power_law_corpus(n, rng):
+    """
+    Returns a LinkMatrix of `n` pages with power-law distributed
+    numbers of links, some pages with none, and links concentrated on
+    a few popular pages.
+    """
+    degree = np.minimum(rng.zipf(2.0, n), n - 1)
+    degree = np.rint(degree * MEAN_LINKS / degree.mean()).astype(np.int64)
+    degree[rng.random(n) < DANGLING] = 0
+    sources = np.repeat(np.arange(n), degree)
+
+    # Page numbers drawn with density falling off as a power law
+    targets = (n * rng.random(len(sources)) ** 3).astype(np.int64)
+    popular = rng.permutation(n)
+    return _matrix(n, sources, popular[targets])
+
+
+# Corpus generators by name
+GRAPHS = {
+    "random": random_corpus,
+    "power-law": power_law_corpus,
+}
+
+
+class Workload():
+    """
+    A generated corpus, held as a LinkMatrix, with its dictionary form
+    built only for the engines that need it.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self._corpus = None
+
+    @property
+    def corpus(self):
+        if self._corpus is None:
+            matrix = self.matrix
+            self._corpus = {
+                page: {
+                    matrix.pages[j]
+                    for j in matrix.indices[matrix.indptr[i]:
+                                            matrix.indptr[i + 1]]
+                }
+                for i, page in enumerate(matrix.pages)
+            }
+        return self._corpus
+
+    def ranks(self, values):
+        """
+        Returns the dictionary of ranks `values` as an array in page order.
+        """
+        return np.array([values[page] for page in self.matrix.pages])
+
+
+def run_iterate(workload):
+    return workload.ranks(pagerank.iterate_pagerank(workload.corpus, DAMPING))
+
+
+def run_sample(workload):
+    return workload.ranks(
+        pagerank.sample_pagerank(workload.corpus, DAMPING, SAMPLES)
+    )
+
+
+def run_sample_fast(workload):
+    return workload.ranks(
+        sampling.sample_pagerank_fast(workload.corpus, DAMPING, SAMPLES)
+    )
+
+
+def run_sample_vectorized(workload):
+    steps, surfers = sampling.walk_shape(SAMPLES)
+    counts = sampling.surfer_visits(workload.matrix, DAMPING, steps, surfers,
+                                    np.random.default_rng())
+    return counts / counts.sum()
+
+
+def run_sparse(workload):
+    ranks, _, _ = power_iteration(workload.matrix, DAMPING)
+    return ranks
+
+
+def run_gauss_seidel(workload):
+    ranks, _, _ = solvers.solve(workload.matrix, DAMPING, "gauss-seidel")
+    return ranks
+
+
+def run_quadratic(workload):
+    ranks, _, _ = solvers.solve(workload.matrix, DAMPING, "quadratic")
+    return ranks
+
+
+def run_edge_list(workload):
+    matrix = workload.matrix
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "links.edges")
+        outofcore._write(path, matrix.pages, (
+            matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]]
+            for i in range(len(matrix))
+        ))
+        edges = outofcore.EdgeList(path)
+        ranks, _, _ = outofcore.edge_list_pagerank(edges, DAMPING)
+        del edges
+    return ranks
+
+
+# Engine names to (function, most pages it is run on), where each
+# function returns ranks in page order for a Workload
+ENGINES = {
+    "iterate": (run_iterate, 10 ** 3),
+    "sample": (run_sample, 10 ** 3),
+    "sample-fast": (run_sample_fast, 10 ** 5),
+    "sample-vectorized": (run_sample_vectorized, 10 ** 6),
+    "sparse": (run_sparse, 10 ** 6),
+    "gauss-seidel": (run_gauss_seidel, 10 ** 6),
+    "quadratic": (run_quadratic, 10 ** 6),
+    "edge-list": (run_edge_list, 10 ** 6),
+}
+
+
+def run_benchmarks(graph, n, engines, target_error=TARGET_ERROR, seed=0):
+    """
+    Returns a list of result rows, one for each engine able to handle
+    a `graph` corpus of `n` pages, plus one for the samples needed.
+    """
+    matrix = GRAPHS[graph](n, np.random.default_rng(seed))
+    reference, _, _ = power_iteration(matrix, DAMPING, REFERENCE_TOLERANCE,
+                                      max_iterations=10 ** 4)
+    base = {"graph": graph, "pages": n, "links": len(matrix.indices)}
+
+    rows = []
+    for engine in engines:
+        function, limit = ENGINES[engine]
+        if n > limit:
+            continue
+        seconds, peak, ranks = measure(function, Workload(matrix))
+        samples = SAMPLES if engine.startswith("sample") else None
+        rows.append(dict(base, engine=engine, seconds=seconds,
+                         peak_bytes=peak,
+                         l1_error=float(np.abs(ranks - reference).sum()),
+                         samples=samples))
+
+    samples, error = samples_needed(matrix, reference, target_error, seed)
+    rows.append(dict(base, engine="samples-needed", seconds=None,
+                     peak_bytes=None, l1_error=error, samples=samples))
+    return rows
+
+
+def measure(function, workload):
+    """
+    Runs `function(workload)` once for timing and once under tracemalloc
+    for its peak memory. Returns a (seconds, peak_bytes, ranks) tuple.
+    """
+    start = time.perf_counter()
+    ranks = function(workload)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(workload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, ranks
+
+
+def samples_needed(matrix, reference, target_error=TARGET_ERROR, seed=0):
+    """
+    Returns (samples, error) for the fewest samples, doubling from
+    SURFERS, with which vectorized sampling is within `target_error`
+    of the reference ranks in L1. Samples is None if MAX_SAMPLES are
+    not enough, with error the error they reached.
+
+    Every budget is shaped by `sampling.walk_shape`, so the surfers are
+    burned in and walk at least MIN_STEPS counted steps each, and a
+    larger budget means more surfers, then longer walks.
+    """
+    rng = np.random.default_rng(seed)
+    samples = sampling.SURFERS
+    while True:
+        steps, surfers = sampling.walk_shape(samples)
+        counts = sampling.surfer_visits(matrix, DAMPING, steps, surfers, rng)
+        error = float(np.abs(counts / counts.sum() - reference).sum())
+        if error <= target_error:
+            return samples, error
+        if samples * 2 > MAX_SAMPLES:
+            return None, error
+        samples *= 2
+
+
+def _matrix(n, sources, targets):
+    """
+    Returns the LinkMatrix for links from `sources` to `targets`, with
+    self-links and repeated links dropped.
+    """
+    keep = sources != targets
+    links = np.unique(sources[keep] * n + targets[keep])
+    sources, targets = np.divmod(links, n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    width = len(str(n - 1))
+    pages = [f"{i:0{width}d}.html" for i in range(n)]
+    return LinkMatrix(pages, indptr, targets)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+from html.parser import HTMLParser
+from multiprocessing import Pool
+
+# Bump whenever the index layout changes, so old indexes get rebuilt
+VERSION = 1
+
+FILENAME = "links.index"
+
+# Bytes of HTML fed to the tokenizer at a time
+CHUNK_SIZE = 1 << 16
+
+# Fewest changed pages worth starting a process pool for
+POOL_THRESHOLD = 256
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python crawler.py corpus [processes]")
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    corpus, parsed = crawl_changed(sys.argv[1], processes)
+    links = sum(len(links) for links in corpus.values())
+    print(f"Crawled {len(corpus)} pages with {links} links "
+          f"({parsed} pages parsed)")
+
+
+class LinkParser(HTMLParser):
+    """
+    Incremental HTML tokenizer collecting the `href` of every anchor,
+    so a page can be fed in chunks rather than read whole.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        for name, value in attrs:
+            if name == "href" and value is not None:
+                self.links.add(value)
+
+
+def crawl(directory, processes=None):
+    """
+    Parse a directory of HTML pages and check for links to other pages.
+    Return a dictionary where each key is a page, and values are
+    a set of all other pages in the corpus that are linked to by the page.
+
+    Only pages changed since the last crawl are parsed, in parallel;
+    the links of the rest come from the directory's link index.
+    """
+    corpus, _ = crawl_changed(directory, processes)
+    return corpus
+
+
+def crawl_changed(directory, processes=None):
+    """
+    Crawls `directory` as `crawl` does, returning a (corpus, parsed)
+    tuple where parsed is the number of pages that had to be parsed.
+    """
+    path = os.path.join(directory, FILENAME)
+    index = read_index(path)
+
+    # Reuse the links of every page whose stamp is unchanged
+    stamps = page_stamps(directory)
+    links = {}
+    changed = []
+    for filename, stamp in stamps.items():
+        entry = index.get(filename)
+        if entry is not None and entry[0] == stamp:
+            links[filename] = entry[1]
+        else:
+            changed.append(filename)
+
+    paths = [os.path.join(directory, filename) for filename in changed]
+    if len(paths) < POOL_THRESHOLD or processes == 1:
+        parsed = map(parse_links, paths)
+        links.update(zip(changed, parsed))
+    else:
+        chunksize = max(1, len(paths) // (4 * (processes or os.cpu_count())))
+        with Pool(processes) as pool:
+            links.update(zip(changed, pool.imap(parse_links, paths,
+                                                chunksize)))
+
+    if changed or len(index) != len(stamps):
+        try:
+            write_index(path, {
+                filename: [stamps[filename], links[filename]]
+                for filename in stamps
+            })
+        except OSError:
+            # A read-only corpus directory just means no caching
+            pass
+
+    # Only include links to other pages in the corpus
+    corpus = {
+        filename: (stamps.keys() & links[filename]) - {filename}
+        for filename in stamps
+    }
+    return corpus, len(changed)
+
+
+def parse_links(path):
+    """
+    Returns a sorted list of the distinct anchor targets in an HTML file,
+    read and tokenized a chunk at a time.
+    """
+    parser = LinkParser()
+    with open(path, errors="replace") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            parser.feed(chunk)
+    parser.close()
+    return sorted(parser.links)
+
+
+def page_stamps(directory):
+    """
+    Returns a dictionary mapping each `.html` file in `directory`
+    to its [mtime_ns, size].
+    """
+    stamps = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".html") and entry.is_file():
+                stat = entry.stat()
+                stamps[entry.name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def read_index(path):
+    """
+    Returns the pages of the link index at `path`, mapping each file to
+    its [stamp, links], or an empty dictionary if there is no usable
+    index, so that every page is parsed again.
+    """
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != VERSION:
+        return {}
+
+    # A corrupt index is rebuilt rather than trusted
+    try:
+        pages = index["pages"]
+        for stamp, links in pages.values():
+            if (not isinstance(stamp, list) or len(stamp) != 2
+                    or not all(isinstance(value, int) for value in stamp)
+                    or not isinstance(links, list)
+                    or not all(isinstance(link, str) for link in links)):
+                return {}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return {}
+    return pages
+
+
+def write_index(path, pages):
+    """
+    Writes a link index mapping each file to its [stamp, links].
+    """
+    # Write next to the destination, then swap it in atomically
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({"version": VERSION, "pages": pages}, f,
+                  separators=(",", ":"))
+    os.replace(temporary, path)
+
+
+if __name__ == "__main__":
+    main()
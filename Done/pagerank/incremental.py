@@ -0,0 +1,167 @@
+import sys
+from collections import deque
+
+import numpy as np
+
+from crawler import crawl
+from pagerank import DAMPING
+from sparse import MAX_ITERATIONS, TOLERANCE, LinkMatrix, power_iteration
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python incremental.py corpus "
+                 "[+source:target | -source:target ...]")
+    corpus = crawl(sys.argv[1])
+    added, removed = [], []
+    for edit in sys.argv[2:]:
+        if edit[:1] not in ("+", "-") or ":" not in edit:
+            sys.exit(f"Not a link edit: {edit}")
+        link = tuple(edit[1:].split(":", 1))
+        (added if edit[0] == "+" else removed).append(link)
+
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, cold, _ = power_iteration(matrix, DAMPING)
+    ranks = matrix.to_dict(ranks)
+
+    _, _, warm, _ = update_pagerank(corpus, ranks, added, removed)
+    corpus, ranks, pushes, residual = update_pagerank(
+        corpus, ranks, added, removed, push=True
+    )
+    print(f"PageRank Results after {len(added)} added and "
+          f"{len(removed)} removed links")
+    print(f"  ({cold} sweeps from uniform, {warm} warm-started, "
+          f"{pushes} pushes, residual {residual:.2e})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def apply_delta(corpus, added=(), removed=()):
+    """
+    Returns a copy of `corpus` with the (source, target) links in
+    `removed` taken out and those in `added` put in. Pages named by an
+    added link that are not yet in the corpus are created.
+    """
+    corpus = {page: set(links) for page, links in corpus.items()}
+    for source, target in removed:
+        if source in corpus:
+            corpus[source].discard(target)
+    for source, target in added:
+        corpus.setdefault(source, set())
+        corpus.setdefault(target, set())
+        if source != target:
+            corpus[source].add(target)
+    return corpus
+
+
+def update_pagerank(corpus, ranks, added=(), removed=(),
+                    damping_factor=DAMPING, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, push=False):
+    """
+    Return PageRank values for `corpus` after a link delta, starting
+    from `ranks`, the PageRank values before the change.
+
+    By default the new ranks are found by power iteration from the old
+    ones. With `push`, only the pages whose rank is actually disturbed
+    are updated, by pushing residual rank along their links until no
+    page holds more than its share of `tolerance`.
+
+    Return a (corpus, ranks, work, residual) tuple, where corpus is the
+    edited corpus, ranks a dictionary of the new PageRank values, work
+    the number of sweeps (or, with `push`, single-page pushes) taken and
+    residual the L1 error measure reached.
+    """
+    corpus = apply_delta(corpus, added, removed)
+    matrix = LinkMatrix.from_corpus(corpus)
+    n = len(matrix)
+
+    # Pages new to the corpus start at the uniform rank
+    start = np.array([ranks.get(page, 1 / n) for page in matrix.pages])
+    start /= start.sum()
+
+    if push:
+        new_ranks, work, residual = push_pagerank(
+            matrix, start, damping_factor, tolerance, max_iterations * n
+        )
+    else:
+        new_ranks, work, residual = power_iteration(
+            matrix, damping_factor, tolerance, max_iterations, start
+        )
+    return corpus, matrix.to_dict(new_ranks), work, residual
+
+
+def push_pagerank(matrix, ranks, damping_factor, tolerance=TOLERANCE,
+                  max_pushes=None):
+    """
+    Refines approximate PageRank values `ranks` over a LinkMatrix by
+    residual pushing.
+
+    The residual of a page is how much its rank would change on one
+    more sweep. Pushing a page moves its residual into its rank and
+    passes the damped share on to the pages it links to, so work is
+    only spent where the residual is. Dangling pages spread theirs
+    evenly over all pages, which is applied in bulk once no single page
+    is left to push.
+
+    Stops once no page's residual is above tolerance / n, which bounds
+    the total residual by `tolerance`. Returns a (ranks, pushes,
+    residual) tuple with residual the L1 norm of the final residuals.
+    """
+    n = len(matrix)
+    threshold = tolerance / n
+    ranks = np.array(ranks, dtype=float)
+    residual = ((1 - damping_factor) / n
+                + damping_factor * matrix.propagate(ranks) - ranks)
+
+    # Per-page work is scalar, where Python lists beat NumPy arrays
+    x = ranks.tolist()
+    r = residual.tolist()
+    out_degree = matrix.out_degree.tolist()
+    indptr = matrix.indptr.tolist()
+    indices = matrix.indices.tolist()
+
+    queue = deque(u for u in range(n) if abs(r[u]) > threshold)
+    queued = [False] * n
+    for u in queue:
+        queued[u] = True
+    uniform = 0.0
+    pushes = 0
+
+    while queue or abs(uniform) * n > tolerance:
+        if not queue:
+            # Spread what dangling pages pushed, then look again
+            for v in range(n):
+                r[v] += uniform
+                if abs(r[v]) > threshold and not queued[v]:
+                    queued[v] = True
+                    queue.append(v)
+            uniform = 0.0
+            continue
+        if max_pushes is not None and pushes >= max_pushes:
+            break
+
+        u = queue.popleft()
+        queued[u] = False
+        pushed = r[u]
+        x[u] += pushed
+        r[u] = 0.0
+        pushes += 1
+
+        degree = out_degree[u]
+        if degree == 0:
+            uniform += damping_factor * pushed / n
+            continue
+        share = damping_factor * pushed / degree
+        for v in indices[indptr[u]:indptr[u + 1]]:
+            r[v] += share
+            if abs(r[v]) > threshold and not queued[v]:
+                queued[v] = True
+                queue.append(v)
+
+    ranks = np.array(x)
+    residual = float(np.abs(np.array(r) + uniform).sum())
+    return ranks, pushes, residual
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import struct
+import sys
+
+import numpy as np
+
+from crawler import parse_links
+from pagerank import DAMPING
+from sparse import MAX_ITERATIONS, TOLERANCE
+
+# Bump whenever the layout below changes
+VERSION = 1
+
+MAGIC = b"PAGELINK"
+
+# Magic, version, number of pages, number of links, names blob size
+HEADER = struct.Struct("<8sI4xqqq")
+
+# Links read from disk per chunk of an iteration
+CHUNK_LINKS = 1 << 22
+
+# Pages shown by the command line interface
+TOP = 20
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python outofcore.py corpus edges")
+    crawl_edge_list(sys.argv[1], sys.argv[2])
+    edges = EdgeList(sys.argv[2])
+    ranks, iterations, residual = edge_list_pagerank(edges, DAMPING)
+    print(f"PageRank Results from Edge List "
+          f"({len(edges)} pages, {edges.links} links, "
+          f"{iterations} iterations, residual {residual:.2e})")
+    for i in np.argsort(-ranks, kind="stable")[:TOP]:
+        print(f"  {edges.page(i)}: {ranks[i]:.4f}")
+
+
+class EdgeList():
+    """
+    Link graph memory-mapped from a binary edge list file, so that it
+    never has to fit in memory.
+
+    The file holds the out-degree of every page, then every link as a
+    (source, target) pair of page numbers sorted by source, then the
+    page names, with pages numbered in sorted name order.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, n, links, names_size = HEADER.unpack(
+                f.read(HEADER.size)
+            )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an edge list")
+        self.path = path
+        self.n = n
+        self.links = links
+
+        position = HEADER.size
+        self.out_degree = np.memmap(path, dtype="<u4", mode="r",
+                                    offset=position, shape=(n,))
+        position += _padded(4 * n)
+        self.edges = np.memmap(path, dtype="<u4", mode="r",
+                               offset=position, shape=(links, 2))
+        position += _padded(8 * links)
+        self.names_offset = position
+        self.names_size = names_size
+        self._names = None
+
+    def __len__(self):
+        return self.n
+
+    def page(self, i):
+        """
+        Returns the name of page number `i`.
+        """
+        if self._names is None:
+            with open(self.path, "rb") as f:
+                f.seek(self.names_offset)
+                blob = f.read(self.names_size)
+            self._names = blob.decode("utf-8").split("\n")
+        return self._names[i]
+
+
+def write_edge_list(corpus, path):
+    """
+    Writes a corpus as returned by `crawl` to `path` as an edge list.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    _write(path, pages, (
+        sorted(index[link] for link in corpus[page]) for page in pages
+    ))
+
+
+def crawl_edge_list(directory, path):
+    """
+    Parses a directory of HTML pages straight into an edge list at
+    `path`, one page at a time, without building a corpus dictionary.
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    index = {page: i for i, page in enumerate(pages)}
+
+    def targets():
+        for i, page in enumerate(pages):
+            links = parse_links(os.path.join(directory, page))
+            yield sorted({index[link] for link in links if link in index} - {i})
+
+    _write(path, pages, targets())
+
+
+def edge_list_pagerank(edges, damping_factor, tolerance=TOLERANCE,
+                       max_iterations=MAX_ITERATIONS,
+                       chunk_links=CHUNK_LINKS):
+    """
+    Runs PageRank iteration over an EdgeList, streaming the links from
+    disk in order every iteration, with ranks held as float32.
+
+    A page with no links shares its rank evenly across all pages, and
+    the surfer jumps to a random page with probability
+    1 - `damping_factor`, as in `iterate_pagerank`. Stops once the L1
+    norm of the change in ranks drops below `tolerance`, or after
+    `max_iterations` iterations. Returns a (ranks, iterations,
+    residual) tuple.
+    """
+    n = len(edges)
+    out_degree = np.asarray(edges.out_degree, dtype=np.float32)
+    dangling = out_degree == 0
+    share = np.zeros(n, dtype=np.float32)
+    ranks = np.full(n, 1 / n, dtype=np.float32)
+
+    residual = float("inf")
+    iterations = 0
+    while iterations < max_iterations:
+        # Rank each page passes along every one of its links
+        np.divide(ranks, out_degree, out=share, where=~dangling)
+
+        received = np.zeros(n, dtype=np.float32)
+        for start in range(0, edges.links, chunk_links):
+            chunk = np.asarray(edges.edges[start:start + chunk_links])
+            received += np.bincount(chunk[:, 1], weights=share[chunk[:, 0]],
+                                    minlength=n).astype(np.float32)
+
+        dangling_rank = float(ranks[dangling].sum(dtype=np.float64))
+        new_ranks = ((1 - damping_factor) / n
+                     + damping_factor * (received + dangling_rank / n))
+        new_ranks = new_ranks.astype(np.float32)
+        residual = float(np.abs(new_ranks - ranks).sum(dtype=np.float64))
+        ranks = new_ranks
+        iterations += 1
+        if residual < tolerance:
+            break
+    return ranks, iterations, residual
+
+
+def _write(path, pages, targets):
+    """
+    Writes the edge list file for `pages`, where `targets` yields the
+    sorted page numbers each page links to, in page order.
+    """
+    n = len(pages)
+    out_degree = np.zeros(n, dtype="<u4")
+    links = 0
+
+    # Write next to the destination, then swap it in atomically
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(b"\0" * (HEADER.size + _padded(4 * n)))
+        for source, linked in enumerate(targets):
+            out_degree[source] = len(linked)
+            pairs = np.empty((len(linked), 2), dtype="<u4")
+            pairs[:, 0] = source
+            pairs[:, 1] = linked
+            f.write(pairs.tobytes())
+            links += len(linked)
+        f.write(b"\0" * (_padded(8 * links) - 8 * links))
+
+        names = "\n".join(pages).encode("utf-8")
+        f.write(names)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, n, links, len(names)))
+        f.write(out_degree.tobytes())
+    os.replace(temporary, path)
+
+
+def _padded(size):
+    return size + -size % 8
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sys
+
+import numpy as np
+
+from crawler import crawl
+from pagerank import DAMPING
+from sparse import MAX_ITERATIONS, TOLERANCE, LinkMatrix
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python personalized.py corpus seeds [seeds ...]")
+    corpus = crawl(sys.argv[1])
+    seed_sets = [seeds.split(",") for seeds in sys.argv[2:]]
+    for seeds in seed_sets:
+        for page in seeds:
+            if page not in corpus:
+                sys.exit(f"Page not in corpus: {page}")
+
+    ranks, index = batch_pagerank(corpus, seed_sets, DAMPING)
+    for seeds, row in zip(seed_sets, ranks):
+        print(f"Personalized PageRank Results for {', '.join(seeds)}")
+        for page in sorted(index):
+            print(f"  {page}: {row[index[page]]:.4f}")
+
+
+def teleport_matrix(matrix, seed_sets):
+    """
+    Returns a (k, n) array of teleport vectors over a LinkMatrix, one
+    row per set of seed pages, each spread evenly over its seeds.
+
+    A page listed twice in a set gets twice the share of a page listed
+    once. Raises ValueError for an empty set of seeds.
+    """
+    teleport = np.zeros((len(seed_sets), len(matrix)))
+    for row, seeds in enumerate(seed_sets):
+        columns = [matrix.index[page] for page in seeds]
+        if not columns:
+            raise ValueError(f"Seed set {row} has no pages")
+        np.add.at(teleport[row], columns, 1 / len(columns))
+    return teleport
+
+
+def personalized_pagerank(matrix, teleport, damping_factor,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Runs personalized PageRank over a LinkMatrix for every row of
+    `teleport`, a (k, n) array of distributions over pages.
+
+    Instead of jumping to a page chosen uniformly, the surfer jumps by
+    the row's distribution, and so does a surfer on a page with no
+    links. All rows are iterated together, each dropping out once its
+    L1 change drops below `tolerance`. Returns a (ranks, iterations)
+    tuple with ranks a (k, n) array.
+    """
+    n = len(matrix)
+    teleport = np.asarray(teleport, dtype=float)
+    ranks = teleport.copy()
+    active = np.arange(len(ranks))
+    iterations = 0
+    while len(active) and iterations < max_iterations:
+        batch = ranks[active]
+        jump = teleport[active]
+
+        # Without a sparse matrix library, one weighted bincount per
+        # row beats gathering every link for all rows at once
+        received = np.empty_like(batch)
+        for row, values in enumerate(batch):
+            received[row] = np.bincount(
+                matrix.indices,
+                weights=values[matrix.sources] * matrix.link_weights,
+                minlength=n
+            )
+        received += jump * batch[:, matrix.dangling].sum(axis=1,
+                                                         keepdims=True)
+
+        new_batch = (1 - damping_factor) * jump + damping_factor * received
+        residual = np.abs(new_batch - batch).sum(axis=1)
+        ranks[active] = new_batch
+        active = active[residual >= tolerance]
+        iterations += 1
+    return ranks, iterations
+
+
+def batch_pagerank(corpus, seed_sets, damping_factor, tolerance=TOLERANCE,
+                   max_iterations=MAX_ITERATIONS):
+    """
+    Return personalized PageRank values for each set of seed pages in
+    `seed_sets`.
+
+    Return a (ranks, index) tuple, where ranks is a float32 array with
+    one row per seed set and one column per page, and index is a
+    dictionary mapping each page name to its column.
+    """
+    matrix = LinkMatrix.from_corpus(corpus)
+    teleport = teleport_matrix(matrix, seed_sets)
+    ranks, _ = personalized_pagerank(
+        matrix, teleport, damping_factor, tolerance, max_iterations
+    )
+    return ranks.astype(np.float32), matrix.index
+
+
+if __name__ == "__main__":
+    main()
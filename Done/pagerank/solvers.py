@@ -0,0 +1,215 @@
+import sys
+import time
+
+import numpy as np
+
+from crawler import crawl
+from pagerank import DAMPING
+from sparse import MAX_ITERATIONS, TOLERANCE, LinkMatrix
+
+# Blocks of pages a Gauss-Seidel sweep updates in turn, each block
+# seeing the ranks already updated by the blocks before it
+BLOCKS = 64
+
+# Jacobi iterations between extrapolation steps
+EXTRAPOLATE_EVERY = 10
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python solvers.py corpus [tolerance]")
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else TOLERANCE
+    matrix = LinkMatrix.from_corpus(crawl(sys.argv[1]))
+
+    print(f"PageRank Solvers (tolerance {tolerance:.0e})")
+    best = None
+    for name in SOLVERS:
+        start = time.perf_counter()
+        ranks, iterations, residual = solve(matrix, DAMPING, name, tolerance)
+        elapsed = time.perf_counter() - start
+        print(f"  {name}: {iterations} iterations in {elapsed:.4f}s, "
+              f"residual {residual:.2e}")
+        if best is None or elapsed < best[0]:
+            best = (elapsed, name, ranks)
+
+    _, name, ranks = best
+    print(f"PageRank Results from {name}")
+    ranks = matrix.to_dict(ranks)
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def solve(matrix, damping_factor, solver="jacobi", tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS, callback=None):
+    """
+    Computes PageRank over a LinkMatrix with the named solver from
+    SOLVERS.
+
+    Every solver stops once the L1 norm of the change in ranks over an
+    iteration drops below `tolerance`, or after `max_iterations`
+    iterations. If given, `callback(iteration, residual, seconds)` is
+    called after every iteration with the time that iteration took.
+    Returns a (ranks, iterations, residual) tuple.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    n = len(matrix)
+    ranks = np.full(n, 1 / n)
+    step = SOLVERS[solver](matrix, damping_factor)
+
+    residual = float("inf")
+    iterations = 0
+    while iterations < max_iterations:
+        start = time.perf_counter()
+        new_ranks = step(ranks)
+        residual = float(np.abs(new_ranks - ranks).sum())
+        ranks = new_ranks
+        iterations += 1
+        if callback is not None:
+            callback(iterations, residual, time.perf_counter() - start)
+        if residual < tolerance:
+            break
+    return ranks / ranks.sum(), iterations, residual
+
+
+def solver_pagerank(corpus, damping_factor, solver="jacobi",
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    callback=None):
+    """
+    Return PageRank values for each page with the named solver.
+
+    Return a (ranks, iterations, residual) tuple as `solve` does, with
+    ranks a dictionary from page names to PageRank values.
+    """
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, iterations, residual = solve(
+        matrix, damping_factor, solver, tolerance, max_iterations, callback
+    )
+    return matrix.to_dict(ranks), iterations, residual
+
+
+def jacobi(matrix, damping_factor):
+    """
+    Returns the step function of plain Jacobi (power) iteration, where
+    every rank is computed from the ranks of the previous iteration.
+    """
+    n = len(matrix)
+
+    def step(ranks):
+        return (1 - damping_factor) / n + damping_factor * matrix.propagate(ranks)
+
+    return step
+
+
+def gauss_seidel(matrix, damping_factor):
+    """
+    Returns the step function of block Gauss-Seidel iteration, which
+    updates the ranks in place a block of pages at a time, so later
+    blocks already use the new ranks of earlier ones. With one page
+    per block this is exact Gauss-Seidel.
+    """
+    n = len(matrix)
+
+    # Links sorted by the page they point to
+    order = np.argsort(matrix.indices, kind="stable")
+    sources = matrix.sources[order]
+    targets = matrix.indices[order]
+    weights = matrix.link_weights[order]
+    inbound = np.searchsorted(targets, np.arange(n + 1))
+    bounds = np.linspace(0, n, min(n, BLOCKS) + 1).astype(np.int64)
+
+    def step(ranks):
+        ranks = ranks.copy()
+        dangling_rank = ranks[matrix.dangling].sum()
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            first, last = inbound[lo], inbound[hi]
+            received = np.bincount(
+                targets[first:last] - lo,
+                weights=ranks[sources[first:last]] * weights[first:last],
+                minlength=hi - lo
+            )
+            block = ((1 - damping_factor) / n
+                     + damping_factor * (received + dangling_rank / n))
+            dangling = matrix.dangling[lo:hi]
+            dangling_rank += (block[dangling] - ranks[lo:hi][dangling]).sum()
+            ranks[lo:hi] = block
+
+        # Unlike a Jacobi step, a sweep does not keep the total rank at
+        # 1, and the error in the total would otherwise decay slowly
+        return ranks / ranks.sum()
+
+    return step
+
+
+def aitken(matrix, damping_factor):
+    """
+    Returns the step function of Jacobi iteration with Aitken's delta
+    squared extrapolation applied to each rank every EXTRAPOLATE_EVERY
+    iterations.
+    """
+    power = jacobi(matrix, damping_factor)
+    count = 0
+
+    def step(ranks):
+        nonlocal count
+        count += 1
+        new_ranks = power(ranks)
+        if count % EXTRAPOLATE_EVERY == 0:
+            x0, x1, x2 = ranks, new_ranks, power(new_ranks)
+            denominator = x2 - 2 * x1 + x0
+            safe = np.abs(denominator) > 1e-15
+            extrapolated = x2.copy()
+            extrapolated[safe] -= ((x2 - x1)[safe] ** 2) / denominator[safe]
+            new_ranks = _project(extrapolated)
+        return new_ranks
+
+    return step
+
+
+def quadratic(matrix, damping_factor):
+    """
+    Returns the step function of Jacobi iteration with quadratic
+    extrapolation (Kamvar et al., 2003) from the last four iterates
+    every EXTRAPOLATE_EVERY iterations.
+    """
+    power = jacobi(matrix, damping_factor)
+    history = []
+    count = 0
+
+    def step(ranks):
+        nonlocal count
+        count += 1
+        history.append(ranks)
+        del history[:-3]
+        new_ranks = power(ranks)
+        if count % EXTRAPOLATE_EVERY == 0 and len(history) == 3:
+            x0, x1, x2 = history
+            y = np.column_stack((x1 - x0, x2 - x0))
+            gamma, *_ = np.linalg.lstsq(y, x0 - new_ranks, rcond=None)
+            g1, g2, g3 = gamma[0], gamma[1], 1.0
+            new_ranks = _project((g1 + g2 + g3) * x1 + (g2 + g3) * x2
+                                 + g3 * new_ranks)
+        return new_ranks
+
+    return step
+
+
+def _project(ranks):
+    """
+    Returns extrapolated ranks made non-negative and summing to 1.
+    """
+    ranks = np.maximum(ranks, 0)
+    return ranks / ranks.sum()
+
+
+# Solver names to functions returning their step function for a matrix
+SOLVERS = {
+    "jacobi": jacobi,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken,
+    "quadratic": quadratic,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import sys
+
+import numpy as np
+
+from crawler import crawl
+from pagerank import DAMPING
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python sparse.py corpus [tolerance] [max_iterations]")
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else TOLERANCE
+    max_iterations = int(sys.argv[3]) if len(sys.argv) > 3 else MAX_ITERATIONS
+    corpus = crawl(sys.argv[1])
+    ranks, iterations, residual = sparse_pagerank(
+        corpus, DAMPING, tolerance, max_iterations
+    )
+    print(f"PageRank Results from Sparse Iteration "
+          f"({iterations} iterations, residual {residual:.2e})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+class LinkMatrix():
+    """
+    Link graph of a corpus in compressed sparse row form.
+
+    Pages are numbered in sorted order. The pages linked to by page `i`
+    are `indices[indptr[i]:indptr[i + 1]]`, and `sources` repeats each
+    page number once per outgoing link, so that `sources[k]` is the
+    page that link `k` comes from.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.indptr = indptr
+        self.indices = indices
+        self.out_degree = np.diff(indptr)
+        self.dangling = self.out_degree == 0
+        self.sources = np.repeat(np.arange(len(pages)), self.out_degree)
+
+        # Share of a page's rank passed along each of its links
+        self.link_weights = 1.0 / self.out_degree[self.sources]
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the matrix for a corpus as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(index[link] for link in corpus[page])
+            indices.extend(links)
+            indptr[i + 1] = indptr[i] + len(links)
+        return cls(pages, indptr, np.array(indices, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.pages)
+
+    def propagate(self, ranks):
+        """
+        Returns the rank each page receives through links alone when
+        every page holds `ranks`, with dangling pages sharing theirs
+        evenly across all pages.
+        """
+        n = len(self.pages)
+        received = np.bincount(self.indices,
+                               weights=ranks[self.sources] * self.link_weights,
+                               minlength=n)
+        return received + ranks[self.dangling].sum() / n
+
+    def to_dict(self, ranks):
+        """
+        Returns a dictionary mapping each page to its entry in `ranks`.
+        """
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
+
+
+def power_iteration(matrix, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, ranks=None):
+    """
+    Runs PageRank power iteration over a LinkMatrix, starting from
+    `ranks` or the uniform distribution.
+
+    Stops once the L1 norm of the change in ranks drops below
+    `tolerance`, or after `max_iterations` sweeps. Returns a
+    (ranks, iterations, residual) tuple.
+    """
+    n = len(matrix)
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+    residual = float("inf")
+    iterations = 0
+    while iterations < max_iterations:
+        new_ranks = ((1 - damping_factor) / n
+                     + damping_factor * matrix.propagate(ranks))
+        residual = float(np.abs(new_ranks - ranks).sum())
+        ranks = new_ranks
+        iterations += 1
+        if residual < tolerance:
+            break
+    return ranks, iterations, residual
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page by sparse power iteration.
+
+    Return a (ranks, iterations, residual) tuple, where ranks is a
+    dictionary from page names to PageRank values summing to 1,
+    iterations is the number of sweeps run and residual is the L1
+    change in ranks on the last sweep.
+    """
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, iterations, residual = power_iteration(
+        matrix, damping_factor, tolerance, max_iterations
+    )
+    return matrix.to_dict(ranks), iterations, residual
+
+
+if __name__ == "__main__":
+    main()